@@ -5,7 +5,9 @@ from __future__ import annotations
 
 import inspect
 import logging
+import sys
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import (
     Any,
     Callable,
@@ -19,13 +21,16 @@ from typing import (
     cast,
 )
 
+from faebryk.core.graph import ImplicitEdges
 from faebryk.core.graph_backends.default import GraphImpl
+from faebryk.core.instrumentation import instrumented
 from faebryk.libs.util import (
     ConfigFlag,
     Holder,
     NotNone,
     TwistArgs,
     cast_assert,
+    class_factory,
     is_type_pair,
     print_stack,
     try_avoid_endless_recursion,
@@ -41,6 +46,19 @@ LINK_TB = ConfigFlag(
     "Save stack trace for each link. Warning: Very slow! Just use for debug",
 )
 ID_REPR = ConfigFlag("ID_REPR", False, "Add object id to repr")
+LAZY = ConfigFlag(
+    "LAZY", False, "Only create graphs for GraphInterfaces once they get connected"
+)
+NET_INDEX = ConfigFlag(
+    "NET_INDEX",
+    False,
+    "Track ModuleInterface connectivity in union-find nets instead of link cliques",
+)
+IMPLICIT_SIBLINGS = ConfigFlag(
+    "IMPLICIT_SIBLINGS",
+    False,
+    "Derive the sibling links of a node's GIFs from the node instead of storing them",
+)
 
 # 1st order classes -----------------------------------------------------------
 T = TypeVar("T", bound="FaebrykLibObject")
@@ -61,6 +79,12 @@ U = TypeVar("U", bound="FaebrykLibObject")
 
 class TraitImpl(Generic[U], ABC):
     trait: Type[Trait[U]]
+    # whether is_implemented is overridden, see FaebrykLibObject._find
+    _dynamic: bool = False
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dynamic = cls.is_implemented is not TraitImpl.is_implemented
 
     def __init__(self) -> None:
         super().__init__()
@@ -124,17 +148,45 @@ class TraitImpl(Generic[U], ABC):
         return True
 
 
+class _NoTraits(dict):
+    """
+    Shared trait dict of all objects without traits, see FaebrykLibObject
+    """
+
+    __slots__ = ()
+
+    def __setitem__(self, key, value):
+        raise TypeError("Shared empty trait dict, use add_trait")
+
+    def __reduce__(self):
+        # stays the shared one when pickled/copied
+        return "_NO_TRAITS"
+
+
+_NO_TRAITS = _NoTraits()
+
+
 class FaebrykLibObject:
-    traits: list[TraitImpl]
+    # allows slotted subclasses without __dict__ (e.g Link, GraphInterface)
+    # pickled state of all objects is thus (__dict__, slots), see object.__getstate__
+    __slots__ = ("_traits",)
+
+    # trait class -> impl
+    # stored trait classes never implement each other (see add_trait)
+    _traits: dict[type, TraitImpl]
 
     def __new__(cls, *args, **kwargs):
         self = super().__new__(cls)
-        # TODO maybe dict[class => [obj]
-        self.traits = []
+        # most objects never get a trait, the dict gets created by add_trait
+        self._traits = _NO_TRAITS
         return self
 
     def __init__(self) -> None: ...
 
+    @property
+    def traits(self) -> list[TraitImpl]:
+        return list(self._traits.values())
+
     _TImpl = TypeVar("_TImpl", bound=TraitImpl)
 
     # TODO type checking InterfaceTrait -> Interface
@@ -143,29 +195,49 @@ class FaebrykLibObject:
         assert isinstance(trait, Trait)
         assert not hasattr(trait, "_obj") or trait._obj is None, "trait already in use"
         trait.set_obj(self)
+        if self._traits is _NO_TRAITS:
+            self._traits = {}
 
         # Override existing trait if more specific or same
         # TODO deal with dynamic traits
-        for i, t in enumerate(self.traits):
+        existing = self._traits.get(trait.trait)
+        if existing is not None:
+            hits = [(trait.trait, existing)]
+        else:
+            hits = [
+                (key, t)
+                for key, t in self._traits.items()
+                if issubclass(key, trait.trait) or issubclass(trait.trait, key)
+            ]
+        if hits:
+            key, t = hits[0]
             hit, replace = t.cmp(trait)
-            if hit:
-                if replace == trait:
-                    t.remove_obj()
-                    self.traits[i] = replace
-                return replace
+            assert hit
+            if replace == trait:
+                t.remove_obj()
+                del self._traits[key]
+                self._traits[trait.trait] = trait
+            return replace
 
         # No hit: Add new trait
-        self.traits.append(trait)
+        self._traits[trait.trait] = trait
         return trait
 
-    def _find(self, trait, only_implemented: bool):
-        return list(
-            filter(
-                lambda tup: tup[1].implements(trait)
-                and (tup[1].is_implemented() or not only_implemented),
-                enumerate(self.traits),
-            )
-        )
+    def _find(self, trait, only_implemented: bool) -> list[TraitImpl]:
+        impl = self._traits.get(trait)
+        if impl is not None:
+            # exact hit, can't be another one (see add_trait)
+            candidates = [impl]
+        else:
+            candidates = [
+                impl for key, impl in self._traits.items() if issubclass(key, trait)
+            ]
+
+        if only_implemented:
+            # slow path for dynamic traits
+            candidates = [t for t in candidates if not t._dynamic or t.is_implemented()]
+
+        return candidates
 
     def del_trait(self, trait):
         candidates = self._find(trait, only_implemented=False)
@@ -173,16 +245,21 @@ class FaebrykLibObject:
         if len(candidates) == 0:
             return
         assert len(candidates) == 1, "{} not in {}[{}]".format(trait, type(self), self)
-        i, impl = candidates[0]
-        assert self.traits[i] == impl
+        impl = candidates[0]
+        assert self._traits[impl.trait] is impl
         impl.remove_obj()
-        del self.traits[i]
+        del self._traits[impl.trait]
 
+    @instrumented("FaebrykLibObject.has_trait")
     def has_trait(self, trait) -> bool:
+        impl = self._traits.get(trait)
+        if impl is not None and not impl._dynamic:
+            return True
         return len(self._find(trait, only_implemented=True)) > 0
 
     V = TypeVar("V", bound=Trait)
 
+    @instrumented("FaebrykLibObject.get_trait")
     def get_trait(self, trait: Type[V]) -> V:
         assert not issubclass(
             trait, TraitImpl
@@ -192,7 +269,7 @@ class FaebrykLibObject:
         assert len(candidates) <= 1
         assert len(candidates) == 1, "{} not in {}[{}]".format(trait, type(self), self)
 
-        out = candidates[0][1]
+        out = candidates[0]
         assert isinstance(out, trait)
         return out
 
@@ -250,6 +327,9 @@ class can_determine_partner_by_single_end(LinkTrait):
 
 # FaebrykLibObjects -----------------------------------------------------------
 class Link(FaebrykLibObject):
+    # there are a lot of links, keep them small (tb only exists for debugging)
+    __slots__ = ("tb",) if LINK_TB else ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -276,16 +356,20 @@ class Link(FaebrykLibObject):
 
 
 class LinkSibling(Link):
-    def __init__(self, interfaces: list[GraphInterface]) -> None:
+    __slots__ = ("interfaces",)
+
+    def __init__(self, interfaces: Sequence[GraphInterface]) -> None:
         super().__init__()
-        self.interfaces = interfaces
+        self.interfaces = tuple(interfaces)
 
-    def get_connections(self) -> list[GraphInterface]:
+    def get_connections(self) -> Sequence[GraphInterface]:
         return self.interfaces
 
 
 class LinkParent(Link):
-    def __init__(self, interfaces: list[GraphInterface]) -> None:
+    __slots__ = ("interfaces",)
+
+    def __init__(self, interfaces: Sequence[GraphInterface]) -> None:
         super().__init__()
 
         assert all([isinstance(i, GraphInterfaceHierarchical) for i in interfaces])
@@ -293,7 +377,8 @@ class LinkParent(Link):
         assert len(interfaces) == 2
         assert len([i for i in interfaces if i.is_parent]) == 1  # type: ignore
 
-        self.interfaces: list[GraphInterfaceHierarchical] = interfaces  # type: ignore
+        self.interfaces: tuple[GraphInterfaceHierarchical, ...]
+        self.interfaces = tuple(interfaces)  # type: ignore
 
     def get_connections(self):
         return self.interfaces
@@ -306,7 +391,9 @@ class LinkParent(Link):
 
 
 class LinkNamedParent(LinkParent):
-    def __init__(self, name: str, interfaces: list[GraphInterface]) -> None:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str, interfaces: Sequence[GraphInterface]) -> None:
         super().__init__(interfaces)
         self.name = name
 
@@ -325,16 +412,18 @@ class LinkDirect(Link):
             assert isinstance(obj, LinkDirect)
             return [i for i in obj.interfaces if i is not other][0]
 
-    def __init__(self, interfaces: list[GraphInterface]) -> None:
+    __slots__ = ("interfaces",)
+
+    def __init__(self, interfaces: Sequence[GraphInterface]) -> None:
         super().__init__()
         assert len(set(map(type, interfaces))) == 1
-        self.interfaces = interfaces
+        self.interfaces = tuple(interfaces)
 
         # TODO not really used, but quite heavy on the performance
         # if len(interfaces) == 2:
         #    self.add_trait(LinkDirect._())
 
-    def get_connections(self) -> list[GraphInterface]:
+    def get_connections(self) -> Sequence[GraphInterface]:
         return self.interfaces
 
 
@@ -342,6 +431,8 @@ class LinkFilteredException(Exception): ...
 
 
 class _TLinkDirectShallow(LinkDirect):
+    __slots__ = ()
+
     def __new__(cls, *args, **kwargs):
         if cls is _TLinkDirectShallow:
             raise TypeError(
@@ -352,9 +443,10 @@ class _TLinkDirectShallow(LinkDirect):
 
 def LinkDirectShallow(if_filter: Callable[[LinkDirect, GraphInterface], bool]):
     class _LinkDirectShallow(_TLinkDirectShallow):
+        __slots__ = ()
         i_filter = if_filter
 
-        def __init__(self, interfaces: list[GraphInterface]) -> None:
+        def __init__(self, interfaces: Sequence[GraphInterface]) -> None:
             if not all(map(self.i_filter, interfaces)):
                 raise LinkFilteredException()
             super().__init__(interfaces)
@@ -366,11 +458,18 @@ Graph = GraphImpl["GraphInterface"]
 
 
 class GraphInterface(FaebrykLibObject):
+    # there are a lot of GIFs, keep them small
+    __slots__ = ("_G", "_node", "name")
+
     GT = Graph
 
     def __init__(self) -> None:
         super().__init__()
-        self.G = self.GT()
+        # in lazy mode graphs get created on first connect (or access)
+        # with implicit siblings the GIFs of a node use the node's graph
+        self._G: Graph | None = (
+            None if LAZY or self.GT.implicit_edges is not None else self.GT()
+        )
 
         # can't put it into constructor
         # else it needs a reference when defining IFs
@@ -386,15 +485,26 @@ class GraphInterface(FaebrykLibObject):
         self._node = value
 
     # Graph stuff
+    @property
+    def G(self) -> Graph:
+        G = self._G
+        if G is None:
+            G = self._G = self.GT()
+        return G
+
     @property
     def edges(self) -> Mapping[GraphInterface, Link]:
-        return self.G.get_edges(self)
+        if self._G is None:
+            return {}
+        return self._G.get_edges(self)
 
     def get_links(self) -> list[Link]:
         return list(self.edges.values())
 
     def get_links_by_type[T: Link](self, link_type: type[T]) -> list[T]:
-        return [link for link in self.get_links() if isinstance(link, link_type)]
+        if self._G is None:
+            return []
+        return list(self._G.get_edges_by_type(self, link_type).values())
 
     @property
     @deprecated("Use get_links")
@@ -405,11 +515,28 @@ class GraphInterface(FaebrykLibObject):
         return set(self.edges.keys())
 
     def is_connected(self, other: GraphInterface):
-        return self.G.is_connected(self, other)
+        if self._G is None:
+            return None
+        return self._G.is_connected(self, other)
+
+    def _merge_graphs(self, other: GraphInterface) -> bool:
+        """
+        Returns whether the graphs were disjoint
+        """
+        lhs, rhs = self._G, other._G
+        # lazy: join the existing graph instead of creating & merging a new one
+        if lhs is None or rhs is None:
+            G = lhs or rhs or self.GT()
+            self._G = other._G = G
+            return True
+
+        _, no_path = lhs.merge(rhs)
+        return no_path
 
     # Less graph-specific stuff
 
     # TODO make link trait to initialize from list
+    @instrumented("GraphInterface.connect")
     def connect(self, other: Self, linkcls=None) -> Self:
         assert other is not self
 
@@ -417,7 +544,7 @@ class GraphInterface(FaebrykLibObject):
             linkcls = LinkDirect
         link = linkcls([other, self])
 
-        _, no_path = self.G.merge(other.G)
+        no_path = self._merge_graphs(other)
 
         if not no_path:
             dup = self.is_connected(other)
@@ -427,6 +554,9 @@ class GraphInterface(FaebrykLibObject):
 
         self.G.add_edge(self, other, link=link)
 
+        if isinstance(link, LinkNamedParent):
+            link.get_child().node._set_parent(link.get_parent().node, link.name)
+
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"GIF connection: {link}")
 
@@ -451,6 +581,8 @@ class GraphInterface(FaebrykLibObject):
 
 
 class GraphInterfaceHierarchical(GraphInterface):
+    __slots__ = ("is_parent",)
+
     def __init__(self, is_parent: bool) -> None:
         super().__init__()
         self.is_parent = is_parent
@@ -478,24 +610,56 @@ class GraphInterfaceHierarchical(GraphInterface):
         return parent.node, conn.name
 
 
-class GraphInterfaceSelf(GraphInterface): ...
+class GraphInterfaceSelf(GraphInterface):
+    __slots__ = ()
+
+
+class GraphInterfaceModuleSibling(GraphInterfaceHierarchical):
+    __slots__ = ()
+
+
+class GraphInterfaceModuleConnection(GraphInterface):
+    __slots__ = ()
 
 
-class GraphInterfaceModuleSibling(GraphInterfaceHierarchical): ...
+def _sibling_neighbors(gif: GraphInterface) -> Sequence[GraphInterface]:
+    # graphs can contain other objects as well
+    node = getattr(gif, "_node", None)
+    if node is None:
+        return ()
+    gifs = node.GIFs
+    if gif is not gifs.self:
+        return (gifs.self,)
+    return [other for other in gifs.get_all() if other is not gif]
 
 
-class GraphInterfaceModuleConnection(GraphInterface): ...
+def _sibling_link(gif: GraphInterface, other: GraphInterface) -> LinkSibling:
+    # same as the stored ones: self first
+    if isinstance(other, GraphInterfaceSelf):
+        gif, other = other, gif
+    return LinkSibling((gif, other))
+
+
+# every GIF of a node is a sibling of the node's self GIF
+_SIBLING_EDGES = ImplicitEdges(LinkSibling, _sibling_neighbors, _sibling_link)
+if IMPLICIT_SIBLINGS:
+    Graph.implicit_edges = _SIBLING_EDGES
 
 
 class Node(FaebrykLibObject):
     @classmethod
+    @class_factory
     def GraphInterfacesCls(cls):
         class InterfaceHolder(Holder(GraphInterface, cls)):
+            @instrumented("InterfaceHolder.handle_add")
             def handle_add(self, name: str, obj: GraphInterface) -> None:
                 assert isinstance(obj, GraphInterface)
                 parent: Node = self.get_parent()
                 obj.node = parent
                 obj.name = name
+                if Graph.implicit_edges is _SIBLING_EDGES:
+                    self._join_graph(obj)
+                    return super().handle_add(name, obj)
                 if not isinstance(obj, GraphInterfaceSelf):
                     if hasattr(self, "self"):
                         obj.connect(self.self, linkcls=LinkSibling)
@@ -505,8 +669,33 @@ class Node(FaebrykLibObject):
                         if target is self.self:
                             continue
                         target.connect(obj, linkcls=LinkSibling)
+                    parent._add_to_indexes(obj.G)
                 return super().handle_add(name, obj)
 
+            def _join_graph(self, obj: GraphInterface):
+                """
+                Add obj to the graph of self.self without a sibling link,
+                see IMPLICIT_SIBLINGS
+                """
+                if isinstance(obj, GraphInterfaceSelf):
+                    assert obj is self.self
+                    obj.G.add_vertex(obj)
+                    for target in self.get_all():
+                        if target is not obj:
+                            self._join_graph(target)
+                    self.get_parent()._add_to_indexes(obj.G)
+                    return
+                if not hasattr(self, "self"):
+                    return
+
+                G = obj._G
+                # fresh GIFs just use the node's graph, no need to merge
+                if G is None or G.node_cnt == 0:
+                    obj._G = self.self.G
+                else:
+                    obj._merge_graphs(self.self)
+                obj.G.add_vertex(obj)
+
             def __init__(self, parent: Node) -> None:
                 super().__init__(parent)
 
@@ -520,15 +709,17 @@ class Node(FaebrykLibObject):
     NT = TypeVar("NT", bound="Node")
 
     @classmethod
+    @class_factory
     def NodesCls(cls, t: Type[NT]):
         class NodeHolder(Holder(t, cls)):
+            @instrumented("NodeHolder.handle_add")
             def handle_add(self, name: str, obj: Node.NT) -> None:
                 assert isinstance(obj, t)
                 parent: Node = self.get_parent()
                 assert not (
                     other_p := obj.get_parent()
                 ), f"{obj} already has parent: {other_p}"
-                obj.GIFs.parent.connect(
+                obj._as_node().GIFs.parent.connect(
                     parent.GIFs.children, LinkNamedParent.curry(name)
                 )
                 return super().handle_add(name, obj)
@@ -539,39 +730,121 @@ class Node(FaebrykLibObject):
         return NodeHolder
 
     @classmethod
+    @class_factory
     def GIFS(cls):
         return cls.GraphInterfacesCls()
 
     @classmethod
+    @class_factory
     def NODES(cls):
         return cls.NodesCls(Node)
 
+    # per-graph indexes, see core.util.get_all_nodes_*
+    TYPE_INDEX = "node_type"
+    TRAIT_INDEX = "node_trait"
+
+    _parent_ref: tuple[Node, str] | None = None
+    _hierarchy: tuple[tuple[Node, str], ...] | None = None
+    _full_names: dict[bool, str]
+
     def __init__(self) -> None:
         super().__init__()
 
-        self.GIFs = Node.GIFS()(self)
+        # the most derived GIFS, so subclasses don't have to rebuild (and thus
+        # throw away) the base GIFs, their sibling links and graphs
+        self.GIFs = type(self).GIFS()(self)
         self.NODEs = Node.NODES()(self)
 
+    def _add_to_indexes(self, G: Graph):
+        G.get_index(Node.TYPE_INDEX).add(type(self), self)
+        trait_index = G.get_index(Node.TRAIT_INDEX)
+        for key in self._traits:
+            trait_index.add(key, self)
+
+    def _as_node(self) -> Self:
+        """
+        Overridden by parameters that are plain values until they join a graph
+        """
+        return self
+
+    def add_trait(self, trait: FaebrykLibObject._TImpl) -> FaebrykLibObject._TImpl:
+        out = super().add_trait(trait)
+        # replaced or deleted traits are not removed from the index
+        # so lookups have to check has_trait anyway (also for dynamic traits)
+        if "GIFs" in self.__dict__:
+            self.get_graph().get_index(Node.TRAIT_INDEX).add(out.trait, self)
+        return out
+
     def get_graph(self):
         return self.GIFs.self.G
 
-    def get_parent(self):
-        return self.GIFs.parent.get_parent()
+    def save_snapshot(self, path: Path):
+        """
+        Write this node and everything in its graph to a binary file,
+        see core.snapshot
+        """
+        from faebryk.core.snapshot import save
+
+        save(self, path)
+
+    @classmethod
+    def load_snapshot(cls, path: Path) -> Self:
+        """
+        Restore a snapshot written by save_snapshot.
+        Only for trusted files written by the same python version,
+        loading runs code from the file, see core.snapshot
+        """
+        from faebryk.core.snapshot import restore
+
+        node = restore(path)
+        assert isinstance(node, cls), f"Snapshot contains {type(node)}, not {cls}"
+        return node
+
+    def get_parent(self) -> tuple[Node, str] | None:
+        return self._parent_ref
+
+    def _set_parent(self, parent: Node, name: str):
+        # called for every LinkNamedParent, see GraphInterface.connect
+        assert (
+            self._parent_ref is None or self._parent_ref[0] is parent
+        ), f"{self} already has parent: {self._parent_ref}"
+        self._parent_ref = (parent, name)
+
+    def _get_hierarchy(self) -> tuple[tuple[Node, str], ...]:
+        # Nodes get parented only once, thus the cache stays valid
+        # as long as its root did not get a parent
+        hierarchy = self._hierarchy
+        if hierarchy is not None and hierarchy[0][0]._parent_ref is None:
+            return hierarchy
+
+        parent = self._parent_ref
+        if parent is None:
+            hierarchy = ((self, "*"),)
+        else:
+            parent_obj, name = parent
+            hierarchy = parent_obj._get_hierarchy() + ((self, name),)
+
+        self._hierarchy = hierarchy
+        self._full_names = {}
+        return hierarchy
 
     def get_hierarchy(self) -> list[tuple[Node, str]]:
-        parent = self.get_parent()
-        if not parent:
-            return [(self, "*")]
-        parent_obj, name = parent
+        return list(self._get_hierarchy())
 
-        return parent_obj.get_hierarchy() + [(self, name)]
+    def get_full_name(self, types: bool = False) -> str:
+        hierarchy = self._get_hierarchy()
+        full_name = self._full_names.get(types)
+        if full_name is not None:
+            return full_name
 
-    def get_full_name(self, types: bool = False):
-        hierarchy = self.get_hierarchy()
+        name = hierarchy[-1][1]
         if types:
-            return ".".join([f"{name}|{type(obj).__name__}" for obj, name in hierarchy])
-        else:
-            return ".".join([f"{name}" for _, name in hierarchy])
+            name = f"{name}|{type(self).__name__}"
+        if len(hierarchy) > 1:
+            name = f"{hierarchy[-2][0].get_full_name(types=types)}.{name}"
+
+        full_name = self._full_names[types] = sys.intern(name)
+        return full_name
 
     @try_avoid_endless_recursion
     def __str__(self) -> str:
@@ -590,14 +863,18 @@ class Parameter(Generic[PV], Node):
     class MergeException(Exception): ...
 
     @classmethod
+    @class_factory
     def GIFS(cls):
         class GIFS(Node.GIFS()):
-            narrowed_by = GraphInterface()
-            narrows = GraphInterface()
+            def __init__(self, parent: Node) -> None:
+                super().__init__(parent)
+                self.narrowed_by = GraphInterface()
+                self.narrows = GraphInterface()
 
         return GIFS
 
     @classmethod
+    @class_factory
     def PARAMS(cls):
         class PARAMS(Module.NodesCls(Parameter)):
             # workaround to help pylance
@@ -609,12 +886,55 @@ class Parameter(Generic[PV], Node):
 
         return PARAMS
 
+    # bumped whenever any narrowing edge gets added
+    _narrow_cnt = 0
+    # bumped on the end of a narrowing chain when it gets narrowed,
+    # invalidates the cached get_most_narrow of its whole chain only
+    _narrow_version = 0
+    # (narrowest, narrowest._narrow_version) of the last get_most_narrow
+    _narrowest: tuple[Parameter, int] | None = None
+    # literals (e.g Constant) are plain values until they get narrowed or attached,
+    # only then they get promoted to a full node (GIFs, PARAMs), see _as_node
+    _literal: bool = False
+    # literals shared by value (see Constant.intern) are never promoted,
+    # narrowing uses a copy of them instead
+    _interned: bool = False
+
     def __init__(self) -> None:
+        if self._literal:
+            return
+
         super().__init__()
 
-        self.GIFs = Parameter.GIFS()(self)
         self.PARAMs = Parameter.PARAMS()(self)
 
+    def _as_node(self) -> Self:
+        if self._literal and "_promoted" not in self.__dict__:
+            assert not self._interned, f"Interned {self} can not become a node, copy it"
+            self.__dict__["_promoted"] = True
+            Node.__init__(self)
+            self.PARAMs = Parameter.PARAMS()(self)
+        return self
+
+    def __getattr__(self, name: str):
+        # only called for missing attributes, probes (e.g hasattr) don't promote
+        if name in ("GIFs", "NODEs", "PARAMs") and self._literal:
+            raise AttributeError(
+                f"Literal {type(self).__name__} has no '{name}' until it becomes"
+                " a node, see _as_node"
+            )
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __getstate__(self):
+        # versions are only meaningful within the process, see core.snapshot
+        state, slots = super().__getstate__()
+        if state and "_narrowest" in state:
+            state = dict(state)
+            del state["_narrowest"]
+        return state, slots
+
     T = TypeVar("T")
     U = TypeVar("U")
 
@@ -627,7 +947,7 @@ class Parameter(Generic[PV], Node):
         from faebryk.library.TBD import TBD
 
         if not isinstance(other, Parameter):
-            return self._merge(Constant(other))
+            return self._merge(Constant.intern(other))
 
         def _is_pair(type1: type[T], type2: type[U]) -> Optional[tuple[T, U]]:
             return is_type_pair(self, other, type1, type2)
@@ -694,10 +1014,17 @@ class Parameter(Generic[PV], Node):
     def _narrowed(self, other: "Parameter[PV]"):
         if self is other:
             return
+        if self._interned:
+            raise ValueError(f"Interned {self} can not be narrowed, copy it")
 
-        if self.GIFs.narrowed_by.is_connected(other.GIFs.narrows):
+        end = self._get_most_narrow()
+        narrowed_by = self._as_node().GIFs.narrowed_by
+        narrows = other._as_node().GIFs.narrows
+        if narrowed_by.is_connected(narrows):
             return
-        self.GIFs.narrowed_by.connect(other.GIFs.narrows)
+        narrowed_by.connect(narrows)
+        end._narrow_version += 1
+        Parameter._narrow_cnt += 1
 
     def is_mergeable_with(self, other: "Parameter[PV]") -> bool:
         try:
@@ -728,15 +1055,19 @@ class Parameter(Generic[PV], Node):
         from faebryk.library.Constant import Constant
 
         if not isinstance(other, Parameter):
-            other = Constant(other)
+            other = Constant.intern(other)
 
         self_narrowed = self.get_most_narrow()
         other_narrowed = other.get_most_narrow()
 
         out = self_narrowed._merge(other_narrowed)
+        if out._interned:
+            out = out.copy()
 
-        self_narrowed._narrowed(out)
-        other_narrowed._narrowed(out)
+        # shared literals are values, nothing narrows them
+        for narrowed in (self_narrowed, other_narrowed):
+            if not narrowed._interned:
+                narrowed._narrowed(out)
 
         return out
 
@@ -744,15 +1075,18 @@ class Parameter(Generic[PV], Node):
         from faebryk.library.Constant import Constant
 
         if not isinstance(other, Parameter):
-            other = Constant(other)
+            other = Constant.intern(other)
 
         self_narrowed = self.get_most_narrow()
         other_narrowed = other.get_most_narrow()
 
         if not other_narrowed.is_more_specific_than(self_narrowed):
             raise self.MergeException("override not possible")
+        if other_narrowed._interned:
+            other_narrowed = other_narrowed.copy()
 
-        self_narrowed._narrowed(other_narrowed)
+        if not self_narrowed._interned:
+            self_narrowed._narrowed(other_narrowed)
         return other_narrowed
 
     # TODO: replace with graph-based
@@ -765,7 +1099,7 @@ class Parameter(Generic[PV], Node):
         from faebryk.library.TBD import TBD
 
         if not isinstance(other, Parameter):
-            return self.op(Constant(other), op)
+            return self.op(Constant.intern(other), op)
 
         op1 = self.get_most_narrow()
         op2 = other.get_most_narrow()
@@ -839,23 +1173,42 @@ class Parameter(Generic[PV], Node):
         return float(p.value)
 
     def get_most_narrow(self) -> Parameter[PV]:
+        end = self._get_most_narrow()
+        # operations resolve further without getting narrowed themselves
+        return end if end is self else end.get_most_narrow()
+
+    def _get_most_narrow(self) -> Parameter[PV]:
+        """
+        End of the narrowing chain, without executing operations
+        """
+        # literal that never got narrowed
+        if "GIFs" not in self.__dict__:
+            return self
+
+        # every parameter of a narrowing chain caches the end of it (path compression)
+        # until that end gets narrowed
+        cached = self._narrowest
+        if cached is not None and cached[0]._narrow_version == cached[1]:
+            return cached[0]
+
         narrowers = {
             narrower
             for narrower_gif in self.GIFs.narrowed_by.get_direct_connections()
             if (narrower := narrower_gif.node) is not self
             and isinstance(narrower, Parameter)
         }
-        if not narrowers:
-            return self
-
-        narrowest_next = unique_ref(
-            narrower.get_most_narrow() for narrower in narrowers
-        )
+        narrowest = self
+        if narrowers:
+            narrowest_next = unique_ref(
+                narrower._get_most_narrow() for narrower in narrowers
+            )
+            assert (
+                len(narrowest_next) == 1
+            ), "Ambiguous narrowest"  # {narrowest_next} for {self}"
+            narrowest = next(iter(narrowest_next))
 
-        assert (
-            len(narrowest_next) == 1
-        ), "Ambiguous narrowest"  # {narrowest_next} for {self}"
-        return next(iter(narrowest_next))
+        self._narrowest = narrowest, narrowest._narrow_version
+        return narrowest
 
     @staticmethod
     def resolve_all(params: "Sequence[Parameter[PV]]") -> Parameter[PV]:
@@ -888,6 +1241,8 @@ class Parameter(Generic[PV], Node):
 
     def get_narrowing_chain(self) -> list[Parameter]:
         out: list[Parameter] = [self]
+        if "GIFs" not in self.__dict__:
+            return out
         narrowers = {
             narrower
             for narrower_gif in self.GIFs.narrowed_by.get_direct_connections()
@@ -901,6 +1256,8 @@ class Parameter(Generic[PV], Node):
         return out
 
     def get_narrowed_siblings(self) -> set[Parameter]:
+        if "GIFs" not in self.__dict__:
+            return set()
         out = {gif.node for gif in self.GIFs.narrows.get_direct_connections()}
         assert all(isinstance(o, Parameter) for o in out)
         return cast(set[Parameter], out)
@@ -978,17 +1335,194 @@ class _LEVEL:
 _CONNECT_DEPTH = _LEVEL()
 
 
+class _NetIndexNode:
+    """
+    Disjoint-set node of a ModuleInterface for NET_INDEX connectivity.
+
+    Every mif owns two of them:
+    - direct: mifs connected through non-filtered links (connections propagate down)
+    - net: mifs connected through any link
+
+    Only the root of a set is meaningful, it keeps the members, the link that
+    represents the set and (net level) the members with a ModuleInterface parent
+    grouped by parent type, of which the parents might have to be connected up.
+    """
+
+    __slots__ = ("parent", "members", "link", "up")
+
+    def __init__(self, mif: ModuleInterface) -> None:
+        self.parent: _NetIndexNode = self
+        self.members: list[ModuleInterface] = [mif]
+        self.link: Link | None = None
+        self.up: dict[type[ModuleInterface], list[ModuleInterface]] = {}
+
+    def find(self) -> _NetIndexNode:
+        root = self
+        while root.parent is not root:
+            root = root.parent
+
+        # path compression
+        node = self
+        while node.parent is not root:
+            node.parent, node = root, node.parent
+
+        return root
+
+    def _resolve_link(self, other: _NetIndexNode, link: Link) -> Link:
+        links = [lnk for lnk in (self.link, other.link, link) if lnk is not None]
+        linkcls = _resolve_link_transitive(type(lnk) for lnk in links)
+        return next(lnk for lnk in links if type(lnk) is linkcls)
+
+    def add_up(self, mif: ModuleInterface):
+        """
+        Only call on roots.
+        """
+        p = mif.get_parent()
+        if p is not None and isinstance(p[0], ModuleInterface):
+            self.up.setdefault(type(p[0]), []).append(mif)
+
+    def union(self, other: _NetIndexNode, link: Link) -> _NetIndexNode:
+        """
+        Union by size, returns the new root.
+        Only call on roots.
+        """
+        assert self.parent is self and other.parent is other
+        if self is other:
+            return self
+
+        big, small = self, other
+        if len(big.members) < len(small.members):
+            big, small = small, big
+
+        big.link = big._resolve_link(small, link)
+        small.parent = big
+        big.members.extend(small.members)
+        small.members = []
+
+        # smaller group into the bigger one
+        for t, mifs in small.up.items():
+            big_mifs = big.up.setdefault(t, mifs)
+            if big_mifs is mifs:
+                continue
+            if len(big_mifs) < len(mifs):
+                big.up[t] = mifs
+                big_mifs, mifs = mifs, big_mifs
+            big_mifs.extend(mifs)
+        small.up = {}
+
+        return big
+
+    @staticmethod
+    def _uniq_up(mifs: list[ModuleInterface]) -> Iterable[ModuleInterface]:
+        """
+        Only one mif per group of directly connected parents, because the parents
+        of the others are connected to that one anyway.
+        """
+        uniq: dict[_NetIndexNode, ModuleInterface] = {}
+        for mif in mifs:
+            parent = cast(ModuleInterface, NotNone(mif.get_parent())[0])
+            uniq.setdefault(parent._get_net_nodes()[0].find(), mif)
+        return uniq.values()
+
+    def _same_type_partners(
+        self, mif: ModuleInterface, other: _NetIndexNode
+    ) -> list[ModuleInterface] | None:
+        """
+        Members of other whose parents are of the type of the parent of mif (in
+        self) and might become connectable to it by joining self and other.
+        None if they can't be narrowed down.
+        """
+        parent = cast(ModuleInterface, NotNone(mif.get_parent())[0])
+        ifs = parent.IFs.get_all()
+        pos = next((i for i, sib in enumerate(ifs) if sib is mif), None)
+        if pos is None:
+            return None
+
+        # the other interfaces of connectable parents are connected already,
+        # so only the parents in the smallest net of a sibling qualify
+        sibling: tuple[int, _NetIndexNode] | None = None
+        for k, sib in enumerate(ifs):
+            if k == pos:
+                continue
+            if sib._net_nodes is None:
+                return []
+            root = sib._net_nodes[1].find()
+            # becomes part of the joined net
+            if root is self or root is other:
+                continue
+            if sibling is None or len(root.members) < len(sibling[1].members):
+                sibling = k, root
+        if sibling is None:
+            return None
+
+        k, root = sibling
+        out = []
+        for m in root.members:
+            p = m.get_parent()
+            if p is None or p[0] is parent or type(p[0]) is not type(parent):
+                continue
+            p_ifs = cast(ModuleInterface, p[0]).IFs.get_all()
+            if len(p_ifs) != len(ifs) or p_ifs[k] is not m:
+                continue
+            partner = p_ifs[pos]
+            if partner._net_nodes and partner._net_nodes[1].find() is other:
+                out.append(partner)
+        return out
+
+    @staticmethod
+    def get_up_candidates(
+        lhs: _NetIndexNode, rhs: _NetIndexNode
+    ) -> list[tuple[ModuleInterface, ModuleInterface]]:
+        """
+        Pairs (src, dst) of members of two nets that are about to be joined,
+        whose parents might have become connectable by the join.
+        src's parent is always an instance of the type of dst's parent.
+        Only call on roots.
+        """
+        # every new pair has a member on each side, start from the smaller one
+        small, big = lhs, rhs
+        if len(big.members) < len(small.members):
+            small, big = big, small
+
+        out = []
+        for st, smifs in small.up.items():
+            for bt, bmifs in big.up.items():
+                if bt is st:
+                    for sm in _NetIndexNode._uniq_up(smifs):
+                        partners = small._same_type_partners(sm, big)
+                        if partners is None:
+                            partners = _NetIndexNode._uniq_up(bmifs)
+                        out.extend((sm, bm) for bm in partners)
+                elif issubclass(st, bt):
+                    out.extend(
+                        (sm, bm)
+                        for sm in _NetIndexNode._uniq_up(smifs)
+                        for bm in _NetIndexNode._uniq_up(bmifs)
+                    )
+                elif issubclass(bt, st):
+                    out.extend(
+                        (bm, sm)
+                        for sm in _NetIndexNode._uniq_up(smifs)
+                        for bm in _NetIndexNode._uniq_up(bmifs)
+                    )
+        return out
+
+
 class ModuleInterface(Node):
     @classmethod
+    @class_factory
     def GIFS(cls):
         class GIFS(Node.GIFS()):
-            specializes = GraphInterface()
-            specialized = GraphInterface()
-            connected = GraphInterfaceModuleConnection()
+            def __init__(self, parent: Node) -> None:
+                super().__init__(parent)
+                self.specializes = GraphInterface()
+                self.specialized = GraphInterface()
+                self.connected = GraphInterfaceModuleConnection()
 
         return GIFS
 
     @classmethod
+    @class_factory
     def IFS(cls):
         class IFS(Module.NodesCls(ModuleInterface)):
             # workaround to help pylance
@@ -998,6 +1532,7 @@ class ModuleInterface(Node):
         return IFS
 
     @classmethod
+    @class_factory
     def PARAMS(cls):
         class PARAMS(Module.NodesCls(Parameter)):
             # workaround to help pylance
@@ -1011,6 +1546,7 @@ class ModuleInterface(Node):
 
     # TODO rename
     @classmethod
+    @class_factory
     def LinkDirectShallow(cls):
         """
         Make link that only connects up but not down
@@ -1025,15 +1561,88 @@ class ModuleInterface(Node):
 
         return _LinkDirectShallowMif
 
-    _LinkDirectShallow: type[_TLinkDirectShallow] | None = None
-
     def __init__(self) -> None:
         super().__init__()
-        self.GIFs = ModuleInterface.GIFS()(self)
         self.PARAMs = ModuleInterface.PARAMS()(self)
         self.IFs = ModuleInterface.IFS()(self)
-        if not type(self)._LinkDirectShallow:
-            type(self)._LinkDirectShallow = type(self).LinkDirectShallow()
+
+        self._net_nodes: tuple[_NetIndexNode, _NetIndexNode] | None = None
+
+    def _get_net_nodes(self) -> tuple[_NetIndexNode, _NetIndexNode]:
+        """
+        (direct, net) disjoint-set nodes, see NET_INDEX
+        """
+        if self._net_nodes is None:
+            self._net_nodes = _NetIndexNode(self), _NetIndexNode(self)
+            self._net_nodes[1].add_up(self)
+        return self._net_nodes
+
+    def _set_parent(self, parent: Node, name: str):
+        had_parent = self._parent_ref is not None
+        super()._set_parent(parent, name)
+        # parent got set after joining a net
+        if not had_parent and self._net_nodes is not None:
+            self._net_nodes[1].find().add_up(self)
+
+    def _net_index_union(
+        self, other: ModuleInterface, link: Link
+    ) -> list[tuple[ModuleInterface, ModuleInterface]]:
+        """
+        Join the sets of self and other.
+        Returns candidates for connecting up, see _NetIndexNode.get_up_candidates.
+        """
+        s_direct, s_net = self._get_net_nodes()
+        o_direct, o_net = other._get_net_nodes()
+
+        if not isinstance(link, _TLinkDirectShallow):
+            s_direct.find().union(o_direct.find(), link)
+
+        s_root, o_root = s_net.find(), o_net.find()
+        if s_root is o_root:
+            s_root.link = s_root._resolve_link(o_root, link)
+            return []
+
+        candidates = _NetIndexNode.get_up_candidates(s_root, o_root)
+        s_root.union(o_root, link)
+        return candidates
+
+    def _net_index_link(self, other: ModuleInterface) -> Link | None:
+        if other is self:
+            return None
+
+        s_direct, s_net = self._get_net_nodes()
+        o_direct, o_net = other._get_net_nodes()
+
+        if (root := s_direct.find()) is o_direct.find():
+            return root.link
+        if (root := s_net.find()) is o_net.find():
+            return root.link
+        return None
+
+    def get_connected(self) -> dict[ModuleInterface, Link]:
+        """
+        All mifs self is connected to (excluding self) with the link that
+        represents the connection.
+        """
+        if not NET_INDEX:
+            return {
+                cast_assert(ModuleInterface, gif.node): link
+                for gif, link in self.GIFs.connected.edges.items()
+                if gif.node is not self
+            }
+
+        s_direct, s_net = self._get_net_nodes()
+        direct_root, net_root = s_direct.find(), s_net.find()
+        direct = {
+            mif: NotNone(direct_root.link)
+            for mif in direct_root.members
+            if mif is not self
+        }
+        return {
+            mif: direct.get(mif) or NotNone(net_root.link)
+            for mif in net_root.members
+            if mif is not self
+        }
 
     def _connect_siblings_and_connections(
         self, other: ModuleInterface, linkcls: type[Link]
@@ -1076,9 +1685,11 @@ class ModuleInterface(Node):
             return {k: type(v) for k, v in get_connected_mifs_with_link(gif).items()}
 
         # Connect to all connections
-        s_con = _get_connected_mifs(self.GIFs.connected) | {self: linkcls}
-        d_con = _get_connected_mifs(other.GIFs.connected) | {other: linkcls}
-        cross_connect(s_con, d_con, "connections")
+        # nets are transitive by construction, so no need to build the clique
+        if not NET_INDEX:
+            s_con = _get_connected_mifs(self.GIFs.connected) | {self: linkcls}
+            d_con = _get_connected_mifs(other.GIFs.connected) | {other: linkcls}
+            cross_connect(s_con, d_con, "connections")
 
         # Connect to all siblings
         s_sib = (
@@ -1173,6 +1784,11 @@ class ModuleInterface(Node):
         except LinkFilteredException:
             return
 
+        up_candidates = []
+        if NET_INDEX:
+            link = NotNone(self.GIFs.connected.is_connected(other.GIFs.connected))
+            up_candidates = self._net_index_union(other, link)
+
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"{' '*2*_CONNECT_DEPTH.inc()}Connect {self} to {other}")
         self._on_connect(other)
@@ -1186,6 +1802,16 @@ class ModuleInterface(Node):
             # level -1 (up) connect
             self._try_connect_up(other)
 
+            # parents of other net members might have become connected by joining
+            for src, dst in up_candidates:
+                src_p = NotNone(src.get_parent())[0]
+                dst_p = NotNone(dst.get_parent())[0]
+                assert isinstance(src_p, ModuleInterface)
+                assert isinstance(dst_p, ModuleInterface)
+                if src_p.is_connected_to(dst_p):
+                    continue
+                src._try_connect_up(dst)
+
         except RecursionError as e:
             recursion_error = e
             if not con_depth_one:
@@ -1197,6 +1823,9 @@ class ModuleInterface(Node):
         _CONNECT_DEPTH.dec()
 
     def get_direct_connections(self) -> set[ModuleInterface]:
+        if NET_INDEX:
+            return set(self.get_connected().keys())
+
         return {
             gif.node
             for gif in self.GIFs.connected.get_direct_connections()
@@ -1226,9 +1855,11 @@ class ModuleInterface(Node):
             intf.connect(other, linkcls=linkcls)
 
     def connect_shallow(self, other: Self) -> Self:
-        return self.connect(other, linkcls=type(self)._LinkDirectShallow)
+        return self.connect(other, linkcls=type(self).LinkDirectShallow())
 
     def is_connected_to(self, other: ModuleInterface):
+        if NET_INDEX:
+            return self._net_index_link(other)
         return self.GIFs.connected.is_connected(other.GIFs.connected)
 
 
@@ -1243,15 +1874,19 @@ class ModuleTrait(_ModuleTrait["Module"]): ...
 
 class Module(Node):
     @classmethod
+    @class_factory
     def GIFS(cls):
         class GIFS(Node.GIFS()):
-            # TODO
-            specializes = GraphInterface()
-            specialized = GraphInterface()
+            def __init__(self, parent: Node) -> None:
+                super().__init__(parent)
+                # TODO
+                self.specializes = GraphInterface()
+                self.specialized = GraphInterface()
 
         return GIFS
 
     @classmethod
+    @class_factory
     def IFS(cls):
         class IFS(Module.NodesCls(ModuleInterface)):
             # workaround to help pylance
@@ -1261,6 +1896,7 @@ class Module(Node):
         return IFS
 
     @classmethod
+    @class_factory
     def PARAMS(cls):
         class PARAMS(Module.NodesCls(Parameter)):
             # workaround to help pylance
@@ -1275,7 +1911,6 @@ class Module(Node):
     def __init__(self) -> None:
         super().__init__()
 
-        self.GIFs = Module.GIFS()(self)
         self.IFs = Module.IFS()(self)
         self.PARAMs = Module.PARAMS()(self)
 
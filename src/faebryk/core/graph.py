@@ -3,15 +3,12 @@
 
 import logging
 from abc import abstractmethod
-from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, Self
-
-from faebryk.libs.util import (
-    ConfigFlag,
-    LazyMixin,
-    SharedReference,
-    bfs_visit,
-    lazy_construct,
-)
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, Self, Sequence
+
+from faebryk.core.instrumentation import instrument_methods, instrumented
+from faebryk.libs.util import UnionFindReference, bfs_visit
 from typing_extensions import deprecated
 
 logger = logging.getLogger(__name__)
@@ -23,46 +20,107 @@ if TYPE_CHECKING:
 
 # TODO create GraphView base class
 
-LAZY = ConfigFlag("LAZY", False, "Use lazy construction for graphs")
-
 
-class Graph[T, GT](LazyMixin, SharedReference[GT]):
+class GraphIndex[V]:
+    """
+    Mergeable mapping from type keys to objects (by identity).
+    Lookups by type also return the objects registered under its subtypes.
+    """
+
+    def __init__(self):
+        self._objs: dict[type, dict[int, V]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: type, obj: V):
+        objs = self._objs.get(key)
+        if objs is None:
+            objs = self._objs[key] = {}
+        if id(obj) not in objs:
+            objs[id(obj)] = obj
+            self._size += 1
+
+    def get(self, key: type | tuple[type, ...]) -> list[V]:
+        matching = [objs for k, objs in self._objs.items() if issubclass(k, key)]
+        if len(matching) == 1:
+            return list(matching[0].values())
+
+        out = {}
+        for objs in matching:
+            out.update(objs)
+        return list(out.values())
+
+    def update(self, other: "GraphIndex[V]"):
+        for key, objs in other._objs.items():
+            own = self._objs.get(key)
+            if own is None:
+                self._objs[key] = own = {}
+            before = len(own)
+            own.update(objs)
+            self._size += len(own) - before
+
+    # ids are only valid within the process, see core.snapshot
+    def __getstate__(self):
+        return {key: list(objs.values()) for key, objs in self._objs.items()}
+
+    def __setstate__(self, state: dict[type, list[V]]):
+        self._objs = {
+            key: {id(obj): obj for obj in objs} for key, objs in state.items()
+        }
+        self._size = sum(len(objs) for objs in self._objs.values())
+
+
+@dataclass(frozen=True)
+class ImplicitEdges[T]:
+    """
+    Edges derived from the objects themselves instead of being stored in the graph.
+    They are part of get_edges, is_connected and bfs_visit, but not of edge_cnt.
+    """
+
+    # type of all implicit links
+    link_type: type["Link"]
+    neighbors: Callable[[T], Sequence[T]]
+    # link between an object and one of its neighbors
+    link: Callable[[T, T], "Link"]
+
+
+class Graph[T, GT](UnionFindReference[GT]):
     # perf counter
     counter = 0
 
+    # only valid on the representative, see get_index
+    _indexes: dict[str, GraphIndex] | None = None
+
+    # same for all graphs, e.g see core.IMPLICIT_SIBLINGS
+    implicit_edges: ImplicitEdges | None = None
+
     def __init__(self, G: GT):
         super().__init__(G)
         type(self).counter += 1
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # backends, see core.instrumentation
+        instrument_methods(cls, "add_edge", "get_edges", "bfs_visit", "_union")
+
     @property
     @deprecated("Use call")
     def G(self):
         return self()
 
+    @instrumented("Graph.merge")
     def merge(self, other: Self) -> tuple[Self, bool]:
         lhs, rhs = self, other
 
-        # if node not init, graph is empty / not existing
-        # thus we dont have to merge the graph, just need to setup the ref
-        if LAZY:
-            if not lhs.is_init or not rhs.is_init:
-                if not lhs.is_init:
-                    lhs, rhs = rhs, lhs
-                rhs.links = lhs.links
-                rhs.object = lhs.object
-                lhs.links.add(rhs)
-                rhs._init = True
-                return lhs, True
-
-        if lhs() == rhs():
+        G_lhs, G_rhs = lhs(), rhs()
+        if G_lhs is G_rhs:
             return self, False
 
-        unioned = self._union(self(), other())
-        if unioned is rhs():
-            lhs, rhs = rhs, lhs
-        if unioned is not lhs():
-            lhs.set(unioned)
+        unioned = self._union(G_lhs, G_rhs)
 
+        l_root, r_root = lhs.representative, rhs.representative
         res = lhs.link(rhs)
         if not res:
             return self, False
@@ -70,7 +128,63 @@ class Graph[T, GT](LazyMixin, SharedReference[GT]):
         # TODO remove, should not be needed
         assert isinstance(res.representative, type(self))
 
-        return res.representative, True
+        root = res.representative
+        root.object = unioned
+        root._merge_indexes(r_root if root is l_root else l_root)
+
+        return root, True
+
+    def save_snapshot(self, path: Path):
+        """
+        Write this graph (and the nodes of its GIFs) to a binary file,
+        see core.snapshot
+        """
+        from faebryk.core.snapshot import save
+
+        save(self, path)
+
+    @classmethod
+    def load_snapshot(cls, path: Path) -> Self:
+        """
+        Restore a snapshot written by save_snapshot.
+        Only for trusted files written by the same python version,
+        loading runs code from the file, see core.snapshot
+        """
+        from faebryk.core.snapshot import restore
+
+        G = restore(path)
+        assert isinstance(G, cls), f"Snapshot contains {type(G)}, not {cls}"
+        return G
+
+    def get_index(self, name: str) -> GraphIndex:
+        """
+        Index with the given name, kept on the representative
+        and merged together with the graph
+        """
+        root = self.representative
+        if root._indexes is None:
+            root._indexes = {}
+        index = root._indexes.get(name)
+        if index is None:
+            index = root._indexes[name] = GraphIndex()
+        return index
+
+    def _merge_indexes(self, old: Self):
+        if old._indexes is None:
+            return
+        if self._indexes is None:
+            self._indexes, old._indexes = old._indexes, None
+            return
+
+        for name, index in old._indexes.items():
+            own = self._indexes.get(name)
+            # merge small into big
+            if own is None or len(own) < len(index):
+                own, index = index, own
+                self._indexes[name] = own
+            if index is not None:
+                own.update(index)
+        old._indexes = None
 
     def __repr__(self) -> str:
         G = self()
@@ -90,6 +204,12 @@ class Graph[T, GT](LazyMixin, SharedReference[GT]):
     @abstractmethod
     def v(self, obj: T): ...
 
+    @abstractmethod
+    def add_vertex(self, obj: T):
+        """
+        Add obj without any edge
+        """
+
     @abstractmethod
     def add_edge(self, from_obj: T, to_obj: T, link: "Link"): ...
 
@@ -99,16 +219,90 @@ class Graph[T, GT](LazyMixin, SharedReference[GT]):
     @abstractmethod
     def get_edges(self, obj: T) -> Mapping[T, "Link"]: ...
 
+    def get_edges_by_type[L: "Link"](self, obj: T, link_type: type[L]) -> Mapping[T, L]:
+        """
+        Edges of obj with a link of (subclass of) link_type.
+        Backends that bucket their adjacency by link class should override this.
+        """
+        return {
+            other: link
+            for other, link in self.get_edges(obj).items()
+            if isinstance(link, link_type)
+        }
+
+    def _with_implicit_edges(
+        self,
+        obj: T,
+        edges: Mapping[T, "Link"],
+        link_type: type["Link"] | None = None,
+    ) -> Mapping[T, "Link"]:
+        """
+        Stored edges of obj (taking precedence) and its implicit ones
+        (with a link of link_type, if given)
+        """
+        implicit = self.implicit_edges
+        if implicit is None:
+            return edges
+        if link_type is not None and not issubclass(implicit.link_type, link_type):
+            return edges
+        neighbors = implicit.neighbors(obj)
+        if not neighbors:
+            return edges
+
+        out = {other: implicit.link(obj, other) for other in neighbors}
+        out.update(edges)
+        return out
+
+    def _implicit_link(self, from_obj: T, to_obj: T) -> "Link | None":
+        implicit = self.implicit_edges
+        if implicit is None or not any(
+            other is to_obj for other in implicit.neighbors(from_obj)
+        ):
+            return None
+        return implicit.link(from_obj, to_obj)
+
     @staticmethod
     @abstractmethod
     def _union(rep: GT, old: GT) -> GT: ...
 
+    @staticmethod
+    def _bfs_accept(
+        filter: Callable[[T], bool] | None,
+        types: type | tuple[type, ...] | None,
+    ) -> Callable[[T], bool] | None:
+        if types is None:
+            return filter
+        if filter is None:
+            return lambda n: isinstance(n, types)
+        return lambda n: isinstance(n, types) and filter(n)
+
+    @instrumented("Graph.bfs_visit")
     def bfs_visit(
-        self, filter: Callable[[T], bool], start: Iterable[T], G: GT | None = None
-    ):
+        self,
+        filter: Callable[[T], bool] | None,
+        start: Iterable[T],
+        G: GT | None = None,
+        types: type | tuple[type, ...] | None = None,
+        exclude: Iterable[T] = (),
+    ) -> set[T]:
+        """
+        Visits all nodes reachable from start via nodes that are instances of
+        types (if given), pass filter (if given) and are not in exclude.
+        Returns all visited nodes (including start).
+        """
         G = G or self()
 
-        return bfs_visit(lambda n: [o for o in self.get_edges(n) if filter(o)], start)
+        accept = self._bfs_accept(filter, types)
+        excluded = set(exclude)
+
+        return bfs_visit(
+            lambda n: [
+                o
+                for o in self.get_edges(n)
+                if o not in excluded and (accept is None or accept(o))
+            ],
+            start,
+        )
 
     def __str__(self) -> str:
         return f"{type(self).__name__}(V={self.node_cnt}, E={self.edge_cnt})"
@@ -122,9 +316,3 @@ class Graph[T, GT](LazyMixin, SharedReference[GT]):
 
     def subgraph_type(self, *types: type[T]):
         return self.subgraph(lambda n: isinstance(n, types))
-
-    # TODO remove boilerplate for lazy, if it becomes a bit more usable
-    def __init_subclass__(cls) -> None:
-        super().__init_subclass__()
-        if LAZY:
-            lazy_construct(cls)
@@ -10,6 +10,7 @@ class Backends(StrEnum):
     NX = auto()
     GT = auto()
     PY = auto()
+    CSR = auto()
 
 
 BACKEND = ConfigFlagEnum(Backends, "BACKEND", Backends.PY, "Graph backend")
@@ -20,6 +21,8 @@ elif BACKEND == Backends.NX:
     from faebryk.core.graph_backends.graphnx import GraphNX as GraphImpl  # noqa: F401
 elif BACKEND == Backends.PY:
     from faebryk.core.graph_backends.graphpy import GraphPY as GraphImpl  # noqa: F401
+elif BACKEND == Backends.CSR:
+    from faebryk.core.graph_backends.graphcsr import GraphCSR as GraphImpl  # noqa: F401
 else:
     print(BACKEND)
     assert False
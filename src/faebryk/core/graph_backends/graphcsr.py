@@ -0,0 +1,278 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, Sized
+
+import numpy as np
+from faebryk.core.graph import Graph
+
+logger = logging.getLogger(__name__)
+
+# only for typechecker
+
+if TYPE_CHECKING:
+    from faebryk.core.core import Link
+
+type L = "Link"
+
+_IDX = np.int32
+_NONE = -1
+_KEY_SHIFT = 32
+# shared by all fresh graphs, arrays are replaced (never written) when growing
+_EMPTY = np.empty(0, dtype=_IDX)
+
+
+def _grow(arr: np.ndarray, size: int, fill: int | None = None) -> np.ndarray:
+    if size <= len(arr):
+        return arr
+    out = np.empty(max(size, 2 * len(arr)), dtype=arr.dtype)
+    out[: len(arr)] = arr
+    if fill is not None:
+        out[len(arr) :] = fill
+    return out
+
+
+class CSRGraph[T](Sized, Iterable[T]):
+    """
+    Undirected graph with dense integer vertex ids.
+
+    Adjacency is kept in growable numpy arrays as per-vertex singly linked lists
+    of half-edges (edge e consists of half-edges 2e and 2e+1):
+    - head[v]: last added half-edge leaving v
+    - next[h]: previous half-edge leaving the same vertex
+    - dst[h]: vertex the half-edge points to
+    Links are stored in a list parallel to the edges.
+    For O(1) edge lookups the vertex pair of every edge is packed into one int.
+    """
+
+    def __init__(self):
+        self._ids: dict[T, int] = {}
+        self._objs: list[T] = []
+        self._links: list[L] = []
+        self._edge_ids: dict[int, int] = {}
+
+        self._head = _EMPTY
+        self._next = _EMPTY
+        self._dst = _EMPTY
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._objs)
+
+    def __len__(self) -> int:
+        return len(self._objs)
+
+    def size(self) -> int:
+        return len(self._links)
+
+    @staticmethod
+    def _key(from_v: int, to_v: int) -> int:
+        if from_v > to_v:
+            from_v, to_v = to_v, from_v
+        return (from_v << _KEY_SHIFT) | to_v
+
+    def v(self, obj: T) -> int:
+        v_i = self._ids.get(obj)
+        if v_i is not None:
+            return v_i
+
+        v_i = len(self._objs)
+        self._ids[obj] = v_i
+        self._objs.append(obj)
+        self._head = _grow(self._head, v_i + 1, fill=_NONE)
+        return v_i
+
+    def add_edge(self, from_obj: T, to_obj: T, link: L):
+        from_v = self.v(from_obj)
+        to_v = self.v(to_obj)
+
+        e = len(self._links)
+        h = 2 * e
+        self._next = _grow(self._next, h + 2)
+        self._dst = _grow(self._dst, h + 2)
+
+        head = self._head
+        self._next[h] = head[from_v]
+        self._dst[h] = to_v
+        head[from_v] = h
+
+        self._next[h + 1] = head[to_v]
+        self._dst[h + 1] = from_v
+        head[to_v] = h + 1
+
+        self._links.append(link)
+        self._edge_ids[self._key(from_v, to_v)] = e
+
+    def _half_edges(self, v_i: int) -> list[int]:
+        """
+        Half-edges leaving v_i, newest first
+        """
+        out = []
+        nxt = self._next.item
+        h = self._head.item(v_i)
+        while h != _NONE:
+            out.append(h)
+            h = nxt(h)
+        return out
+
+    def edges(self, obj: T) -> Mapping[T, L]:
+        v_i = self._ids.get(obj)
+        if v_i is None:
+            return {}
+
+        dst = self._dst.item
+        objs = self._objs
+        links = self._links
+
+        # oldest first and newest link wins, same as dict assignment order
+        out = {}
+        for h in reversed(self._half_edges(v_i)):
+            out[objs[dst(h)]] = links[h >> 1]
+        return out
+
+    def edge(self, from_obj: T, to_obj: T) -> L | None:
+        from_v = self._ids.get(from_obj)
+        to_v = self._ids.get(to_obj)
+        if from_v is None or to_v is None:
+            return None
+
+        e = self._edge_ids.get(self._key(from_v, to_v))
+        if e is None:
+            return None
+        return self._links[e]
+
+    def update(self, other: "CSRGraph[T]"):
+        v_off = len(self._objs)
+        h_off = 2 * len(self._links)
+        v_cnt = len(other._objs)
+        h_cnt = 2 * len(other._links)
+
+        self._head = _grow(self._head, v_off + v_cnt, fill=_NONE)
+        self._next = _grow(self._next, h_off + h_cnt)
+        self._dst = _grow(self._dst, h_off + h_cnt)
+
+        o_head = other._head[:v_cnt]
+        o_next = other._next[:h_cnt]
+        self._head[v_off : v_off + v_cnt] = np.where(
+            o_head == _NONE, _NONE, o_head + h_off
+        )
+        self._next[h_off : h_off + h_cnt] = np.where(
+            o_next == _NONE, _NONE, o_next + h_off
+        )
+        self._dst[h_off : h_off + h_cnt] = other._dst[:h_cnt] + v_off
+
+        self._ids.update({obj: v_i + v_off for obj, v_i in other._ids.items()})
+        mask = (1 << _KEY_SHIFT) - 1
+        e_off = h_off // 2
+        self._edge_ids.update(
+            {
+                self._key((k >> _KEY_SHIFT) + v_off, (k & mask) + v_off): e + e_off
+                for k, e in other._edge_ids.items()
+            }
+        )
+        self._objs.extend(other._objs)
+        self._links.extend(other._links)
+
+    def nbytes(self) -> int:
+        """
+        Bytes used by the index arrays (excluding python objects)
+        """
+        return self._head.nbytes + self._next.nbytes + self._dst.nbytes
+
+
+class GraphCSR[T](Graph[T, CSRGraph[T]]):
+    type GI = CSRGraph[T]
+
+    def __init__(self):
+        super().__init__(CSRGraph[T]())
+
+    @property
+    def node_cnt(self) -> int:
+        return len(self())
+
+    @property
+    def edge_cnt(self) -> int:
+        return self().size()
+
+    def v(self, obj: T):
+        return self().v(obj)
+
+    def add_vertex(self, obj: T):
+        self().v(obj)
+
+    def add_edge(self, from_obj: T, to_obj: T, link: L):
+        self().add_edge(from_obj, to_obj, link=link)
+
+    def is_connected(self, from_obj: T, to_obj: T) -> "Link | None":
+        link = self().edge(from_obj, to_obj)
+        if link is None:
+            return self._implicit_link(from_obj, to_obj)
+        return link
+
+    def get_edges(self, obj: T) -> Mapping[T, L]:
+        return self._with_implicit_edges(obj, self().edges(obj))
+
+    @staticmethod
+    def _union(rep: GI, old: GI):
+        # merge small into big
+        if len(old) > len(rep):
+            rep, old = old, rep
+
+        rep.update(old)
+
+        return rep
+
+    def bfs_visit(
+        self,
+        filter: Callable[[T], bool] | None,
+        start: Iterable[T],
+        G: GI | None = None,
+        types: type | tuple[type, ...] | None = None,
+        exclude: Iterable[T] = (),
+    ) -> set[T]:
+        G = G or self()
+        accept = self._bfs_accept(filter, types)
+        implicit = self.implicit_edges
+
+        ids, objs = G._ids, G._objs
+        head, nxt, dst = G._head.item, G._next.item, G._dst.item
+
+        out = set(start)
+        queue = deque(ids[obj] for obj in out if obj in ids)
+        # 0: not seen, 1: visited, 2: excluded
+        state = bytearray(len(objs))
+        for v_i in queue:
+            state[v_i] = 1
+        for obj in exclude:
+            v_i = ids.get(obj)
+            if v_i is not None and not state[v_i]:
+                state[v_i] = 2
+
+        while queue:
+            v_i = queue.popleft()
+            others = []
+            h = head(v_i)
+            while h != _NONE:
+                others.append(dst(h))
+                h = nxt(h)
+            if implicit is not None:
+                others.extend(ids[obj] for obj in implicit.neighbors(objs[v_i]))
+
+            for w_i in others:
+                if state[w_i]:
+                    continue
+                obj = objs[w_i]
+                if accept is not None and not accept(obj):
+                    continue
+                state[w_i] = 1
+                queue.append(w_i)
+                out.add(obj)
+
+        return out
+
+    def subgraph(self, node_filter: Callable[[T], bool]):
+        return filter(node_filter, self())
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self())
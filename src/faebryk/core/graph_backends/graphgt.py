@@ -3,7 +3,7 @@
 
 import logging
 from collections import defaultdict
-from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, Callable, Iterator, Mapping
 
 import graph_tool as gt
 from faebryk.core.graph import Graph
@@ -96,6 +96,9 @@ class GraphGT[T](Graph[T, gt.Graph]):
     ) -> Callable[[gt.VertexBase | int], O]:
         return lambda v: f(self._v_to_obj(v))
 
+    def add_vertex(self, obj: T):
+        self.v(obj)
+
     def add_edge(self, from_obj: T, to_obj: T, link: "Link"):
         from_v = self.v(from_obj)
         to_v = self.v(to_obj)
@@ -107,7 +110,7 @@ class GraphGT[T](Graph[T, gt.Graph]):
         to_v = self.v(to_obj)
         e = self().edge(from_v, to_v, add_missing=False)
         if not e:
-            return None
+            return self._implicit_link(from_obj, to_obj)
         return self.lp[e]
 
     def get_edges(self, obj: T) -> Mapping[T, "Link"]:
@@ -117,10 +120,13 @@ class GraphGT[T](Graph[T, gt.Graph]):
         def other(v_i_l, v_i_r):
             return v_i_l if v_i_r == v_i else v_i_r
 
-        return {
-            self._v_to_obj(other(v_i_l, v_i_r)): self.lp[v_i_l, v_i_r]
-            for v_i_l, v_i_r in self().get_all_edges(v)
-        }
+        return self._with_implicit_edges(
+            obj,
+            {
+                self._v_to_obj(other(v_i_l, v_i_r)): self.lp[v_i_l, v_i_r]
+                for v_i_l, v_i_r in self().get_all_edges(v)
+            },
+        )
 
     @classmethod
     def _union(cls, g1: gt.Graph, g2: gt.Graph) -> gt.Graph:
@@ -154,12 +160,6 @@ class GraphGT[T](Graph[T, gt.Graph]):
 
         return g1
 
-    def bfs_visit(
-        self, filter: Callable[[T], bool], start: Iterable[T], G: gt.Graph | None = None
-    ):
-        # TODO implement with gt bfs
-        return super().bfs_visit(filter, start, G)
-
     def _iter(self, g: gt.Graph):
         return (self._v_to_obj(v) for v in g.iter_vertices())
 
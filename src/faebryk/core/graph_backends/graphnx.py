@@ -32,6 +32,9 @@ class GraphNX[T](Graph[T, nx.Graph]):
     def v(self, obj: T):
         return obj
 
+    def add_vertex(self, obj: T):
+        self().add_node(obj)
+
     def add_edge(self, from_obj: T, to_obj: T, link: "Link"):
         self().add_edge(from_obj, to_obj, link=link)
 
@@ -39,13 +42,22 @@ class GraphNX[T](Graph[T, nx.Graph]):
         return self.get_edges(from_obj).get(to_obj)
 
     def get_edges(self, obj: T) -> Mapping[T, "Link"]:
-        return {other: d["link"] for other, d in self().adj.get(obj, {}).items()}
+        return self._with_implicit_edges(
+            obj, {other: d["link"] for other, d in self().adj.get(obj, {}).items()}
+        )
 
-    def bfs_visit(self, filter: Callable[[T], bool], start: Iterable[T], G=None):
+    def bfs_visit(
+        self,
+        filter: Callable[[T], bool] | None,
+        start: Iterable[T],
+        G=None,
+        types: type | tuple[type, ...] | None = None,
+        exclude: Iterable[T] = (),
+    ) -> set[T]:
         # nx impl, >3x slower
         # fG = nx.subgraph_view(G, filter_node=filter)
         # return [o for _, o in nx.bfs_edges(fG, start[0])]
-        return super().bfs_visit(filter, start, G)
+        return super().bfs_visit(filter, start, G, types, exclude)
 
     @staticmethod
     def _union(rep: GI, old: GI):
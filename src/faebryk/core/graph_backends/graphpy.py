@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, Sized
 
 from faebryk.core.graph import Graph
@@ -22,6 +22,9 @@ class PyGraph[T](Sized, Iterable[T]):
         # undirected
         self._e = list[tuple[T, T, L]]()
         self._e_cache = defaultdict[T, dict[T, L]](dict)
+        # link class of all edges of a vertex, None if they are of different classes
+        # (rare, e.g GIFs mostly have one kind of link), see edges_by_type
+        self._e_type = dict[T, type[L] | None]()
         self._v = set[T]()
 
     def __iter__(self) -> Iterator[T]:
@@ -33,17 +36,27 @@ class PyGraph[T](Sized, Iterable[T]):
     def size(self) -> int:
         return len(self._e)
 
+    def add_vertex(self, obj: T):
+        self._v.add(obj)
+
     def add_edge(self, from_obj: T, to_obj: T, link: L):
         self._e.append((from_obj, to_obj, link))
-        self._e_cache[from_obj][to_obj] = link
-        self._e_cache[to_obj][from_obj] = link
+        self._cache_edge(from_obj, to_obj, link)
+        self._cache_edge(to_obj, from_obj, link)
         self._v.add(from_obj)
         self._v.add(to_obj)
 
+    def _cache_edge(self, from_obj: T, to_obj: T, link: L):
+        self._e_cache[from_obj][to_obj] = link
+        link_type = type(link)
+        if self._e_type.setdefault(from_obj, link_type) is not link_type:
+            self._e_type[from_obj] = None
+
     def update(self, other: "PyGraph[T]"):
         self._v.update(other._v)
         self._e.extend(other._e)
         self._e_cache.update(other._e_cache)
+        self._e_type.update(other._e_type)
 
     def view(self, filter_node: Callable[[T], bool]) -> "PyGraph[T]":
         return PyGraphView[T](self, filter_node)
@@ -51,6 +64,16 @@ class PyGraph[T](Sized, Iterable[T]):
     def edges(self, obj: T) -> Mapping[T, L]:
         return self._e_cache[obj]
 
+    def edges_by_type(self, obj: T, link_type: type[L]) -> Mapping[T, L]:
+        edges = self._e_cache.get(obj)
+        if not edges:
+            return {}
+
+        edges_type = self._e_type[obj]
+        if edges_type is not None:
+            return edges if issubclass(edges_type, link_type) else {}
+        return {k: v for k, v in edges.items() if isinstance(v, link_type)}
+
 
 class PyGraphView[T](PyGraph[T]):
     def __init__(self, parent: PyGraph[T], filter: Callable[[T], bool]):
@@ -77,6 +100,13 @@ class PyGraphView[T](PyGraph[T]):
     def edges(self, obj: T) -> Mapping[T, L]:
         return {k: v for k, v in self._parent.edges(obj).items() if self._filter(k)}
 
+    def edges_by_type(self, obj: T, link_type: type[L]) -> Mapping[T, L]:
+        return {
+            k: v
+            for k, v in self._parent.edges_by_type(obj, link_type).items()
+            if self._filter(k)
+        }
+
     def view(self, filter_node: Callable[[T], bool]) -> "PyGraph[T]":
         return PyGraphView[T](
             self._parent, lambda x: self._filter(x) and filter_node(x)
@@ -100,17 +130,65 @@ class GraphPY[T](Graph[T, PyGraph[T]]):
     def v(self, obj: T):
         return obj
 
+    def add_vertex(self, obj: T):
+        self().add_vertex(obj)
+
     def add_edge(self, from_obj: T, to_obj: T, link: L):
         self().add_edge(from_obj, to_obj, link=link)
 
     def is_connected(self, from_obj: T, to_obj: T) -> "Link | None":
-        return self.get_edges(from_obj).get(to_obj)
+        link = self().edges(from_obj).get(to_obj)
+        if link is None:
+            return self._implicit_link(from_obj, to_obj)
+        return link
 
     def get_edges(self, obj: T) -> Mapping[T, L]:
-        return self().edges(obj)
+        return self._with_implicit_edges(obj, self().edges(obj))
+
+    def get_edges_by_type(self, obj: T, link_type: type[L]) -> Mapping[T, L]:
+        return self._with_implicit_edges(
+            obj, self().edges_by_type(obj, link_type), link_type
+        )
 
-    def bfs_visit(self, filter: Callable[[T], bool], start: Iterable[T], G=None):
-        return super().bfs_visit(filter, start, G)
+    def bfs_visit(
+        self,
+        filter: Callable[[T], bool] | None,
+        start: Iterable[T],
+        G: GI | None = None,
+        types: type | tuple[type, ...] | None = None,
+        exclude: Iterable[T] = (),
+    ) -> set[T]:
+        G = G or self()
+        if isinstance(G, PyGraphView):
+            return super().bfs_visit(filter, start, G, types, exclude)
+
+        e_cache = G._e_cache
+        empty = {}
+        implicit = self.implicit_edges
+
+        queue = deque(start)
+        excluded = set(exclude).difference(queue)
+        # excluded nodes are marked visited up front, and removed at the end
+        visited = set(queue)
+        visited.update(excluded)
+
+        while queue:
+            n = queue.popleft()
+            others = e_cache.get(n, empty)
+            if implicit is not None:
+                others = [*others, *implicit.neighbors(n)]
+            for o in others:
+                if o in visited:
+                    continue
+                if types is not None and not isinstance(o, types):
+                    continue
+                if filter is not None and not filter(o):
+                    continue
+                visited.add(o)
+                queue.append(o)
+
+        visited.difference_update(excluded)
+        return visited
 
     @staticmethod
     def _union(rep: GI, old: GI):
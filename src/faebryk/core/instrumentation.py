@@ -0,0 +1,194 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Opt-in call counts and timings of core graph operations.
+
+Enable with FBRK_INSTRUMENT=1, the report gets logged at exit.
+Functions are only wrapped when enabled, otherwise instrumentation costs nothing.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Callable
+
+from faebryk.libs.util import ConfigFlag, at_exit
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENT = ConfigFlag(
+    "INSTRUMENT",
+    False,
+    "Record call counts and timings of core graph operations, see core.instrumentation",
+)
+
+
+@dataclass
+class Stat:
+    calls: int = 0
+    # ns, recursive calls are only counted once
+    total: int = 0
+
+
+class Recorder:
+    """
+    Collects a Stat per name and the single calls as trace events
+    (up to max_events, the oldest are kept).
+    """
+
+    def __init__(self, max_events: int = 2_000_000) -> None:
+        self.max_events = max_events
+        # name -> depth of running calls, see instrument
+        self._active: dict[str, int] = {}
+        self.reset()
+
+    def reset(self):
+        self.stats: dict[str, Stat] = {}
+        # (name, start ns, duration ns, thread id)
+        self.events: list[tuple[str, int, int, int]] = []
+        self._start = perf_counter_ns()
+
+    def record(self, name: str, start: int, duration: int, outermost: bool = True):
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = Stat()
+        stat.calls += 1
+        if outermost:
+            stat.total += duration
+        if len(self.events) < self.max_events:
+            self.events.append((name, start, duration, threading.get_ident()))
+
+    def report(self, limit: int | None = None) -> str:
+        """
+        Table of all recorded names, most time consuming first
+        """
+        stats = sorted(self.stats.items(), key=lambda x: x[1].total, reverse=True)
+        if limit is not None:
+            stats = stats[:limit]
+        if not stats:
+            return "No calls recorded"
+
+        width = max(len(name) for name, _ in stats)
+        lines = [f"{'name':<{width}} {'calls':>10} {'total':>12} {'per call':>12}"]
+        for name, stat in stats:
+            lines.append(
+                f"{name:<{width}} {stat.calls:>10} "
+                f"{stat.total / 1e6:>10.2f}ms "
+                f"{stat.total / stat.calls / 1e3:>10.2f}us"
+            )
+        return "\n".join(lines)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            name: {"calls": stat.calls, "total_ms": stat.total / 1e6}
+            for name, stat in self.stats.items()
+        }
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """
+        Trace Event Format, viewable in chrome://tracing or ui.perfetto.dev
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self._start) / 1e3,
+                    "dur": duration / 1e3,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                for name, start, duration, tid in self.events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def export_json(self, path: Path):
+        path.write_text(json.dumps(self.to_json(), indent=4))
+
+    def export_chrome_trace(self, path: Path):
+        path.write_text(json.dumps(self.to_chrome_trace()))
+
+
+recorder = Recorder()
+
+
+def instrument[F: Callable](func: F, name: str, rec: Recorder | None = None) -> F:
+    """
+    Wrap func to record its calls under name (regardless of INSTRUMENT)
+    """
+    rec = rec or recorder
+    active = rec._active
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        depth = active.get(name, 0)
+        active[name] = depth + 1
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            rec.record(name, start, perf_counter_ns() - start, outermost=not depth)
+            active[name] = depth
+
+    return wrapper  # type: ignore
+
+
+def instrumented[F: Callable](name: str) -> Callable[[F], F]:
+    """
+    Decorator recording the calls of the function if INSTRUMENT is enabled
+    """
+
+    def decorator(func: F) -> F:
+        if not INSTRUMENT:
+            return func
+        return instrument(func, name)
+
+    return decorator
+
+
+def instrument_methods(cls: type, *names: str):
+    """
+    Record the calls of the given methods defined by cls (not inherited ones)
+    as <cls name>.<method name> if INSTRUMENT is enabled
+    """
+    if not INSTRUMENT:
+        return
+
+    for name in names:
+        attr = cls.__dict__.get(name)
+        if attr is None:
+            continue
+        full_name = f"{cls.__name__}.{name}"
+        if isinstance(attr, (staticmethod, classmethod)):
+            wrapped = type(attr)(instrument(attr.__func__, full_name))
+        else:
+            wrapped = instrument(attr, full_name)
+        setattr(cls, name, wrapped)
+
+
+def report(limit: int | None = None) -> str:
+    return recorder.report(limit)
+
+
+def export_json(path: Path):
+    recorder.export_json(path)
+
+
+def export_chrome_trace(path: Path):
+    recorder.export_chrome_trace(path)
+
+
+def reset():
+    recorder.reset()
+
+
+if INSTRUMENT:
+    at_exit(lambda: logger.info(f"Instrumentation:\n{report()}"))
@@ -0,0 +1,658 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+"""
+Binary snapshots of instantiated designs.
+
+A snapshot contains everything reachable from a Node (or Graph):
+nodes, GIFs, links, traits, parameters (incl. their narrowing) and the graphs.
+Restoring it does not run any library __init__, which makes loading
+several times faster than building the design again
+(see the snapshot_load benchmark in test/core/test_performance.py).
+
+Snapshots are pickles: loading one can run arbitrary code, so only load
+snapshots from trusted sources. They can only be loaded by the python version
+that wrote them (code objects are marshalled).
+
+Format:
+- header: magic, format version, python version
+- pickle records (protocol 5) sharing one memo:
+    1. the class of every entity and the amount of hash-by-value entities
+    2. the state of the classes that are pickled by value
+    3. the state of each hash-by-value entity (see _Entities.seed)
+    4. the states of all other entities
+
+Entities (FaebrykLibObjects, graph handles, ...) are referenced by index
+instead of being pickled recursively. This keeps the pickle recursion shallow
+independent of the design size. All entities get allocated before any state is
+restored, so resolving a reference is a plain list lookup.
+
+Classes made by memoized factories (see libs.util.class_factory, e.g holders of
+Node.GIFS) are referenced by the factory call that made them.
+Other classes and functions that can not be imported by name (e.g classes
+defined in a Node's __init__, Trait.impl, lambdas) are pickled by value.
+Restoring creates new class objects for those.
+
+Prototype uses the same format in memory to clone nodes, but references
+classes and functions that are not bound to the cloned node (see _Shared).
+"""
+
+import gc
+import importlib
+import io
+import logging
+import marshal
+import pickle
+import struct
+import sys
+import types
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, ForwardRef, TypeVar
+
+from faebryk.core.core import FaebrykLibObject, Node, Parameter, _NetIndexNode
+from faebryk.core.graph import Graph
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FBRKSNAP"
+VERSION = 2
+_HEADER = struct.Struct("<8sHBB")
+_PROTOCOL = 5
+
+# class dict entries that are recreated by the interpreter
+_SKIP_CLASS_ATTRS = {
+    "__dict__",
+    "__weakref__",
+    "__module__",
+    "__qualname__",
+    # rebuilt by the factories on demand
+    "_factory_made",
+}
+_ENTITY_TYPES = (FaebrykLibObject, Graph, _NetIndexNode)
+
+
+class SnapshotError(Exception): ...
+
+
+def _lookup(module_name: str, qualname: str) -> Any:
+    module = sys.modules.get(module_name)
+    if module is None or "<locals>" in qualname:
+        return None
+    obj = module
+    for part in qualname.split("."):
+        obj = getattr(obj, part, None)
+        if obj is None:
+            return None
+    return obj
+
+
+def _importable(obj: Any) -> bool:
+    qualname = getattr(obj, "__qualname__", getattr(obj, "__name__", None))
+    module_name = getattr(obj, "__module__", None)
+    if qualname is None or module_name is None:
+        return False
+    return _lookup(module_name, qualname) is obj
+
+
+def _has_value_hash(obj: Any) -> bool:
+    return type(obj).__hash__ is not object.__hash__
+
+
+# by-value reconstruction ----------------------------------------------------------
+
+
+def _factory_class(module: str, qualname: str, args: tuple) -> type:
+    importlib.import_module(module)
+    factory = _lookup(module, qualname)
+    if factory is None:
+        raise SnapshotError(f"Can't find class factory {module}.{qualname}")
+    # classmethods are called with their class in args
+    return getattr(factory, "__func__", factory)(*args)
+
+
+def _class_state(cls: type) -> dict[str, Any]:
+    return {
+        k: v
+        for k, v in cls.__dict__.items()
+        if k not in _SKIP_CLASS_ATTRS and not k.startswith("_abc_")
+    }
+
+
+def _make_class(meta: type, name: str, bases: tuple[type, ...], module: str, qualname):
+    return meta(name, bases, {"__module__": module, "__qualname__": qualname})
+
+
+def _set_class_state(cls: type, state: dict[str, Any]):
+    for k, v in state.items():
+        setattr(cls, k, v)
+
+
+_EMPTY_CELL = object()
+
+
+def _make_function(code: types.CodeType, module: str, cell_cnt: int):
+    return types.FunctionType(
+        code,
+        vars(sys.modules[module]),
+        None,
+        None,
+        tuple(types.CellType() for _ in range(cell_cnt)),
+    )
+
+
+def _set_function_state(func: types.FunctionType, state: tuple):
+    attrs, cells = state
+    for k, v in attrs.items():
+        setattr(func, k, v)
+    for cell, v in zip(func.__closure__ or (), cells):
+        if v is not _EMPTY_CELL:
+            cell.cell_contents = v
+
+
+def _empty_cell():
+    return _EMPTY_CELL
+
+
+def _make_typevar(name: str, bound, constraints, covariant: bool, contravariant: bool):
+    return TypeVar(
+        name,
+        *constraints,
+        bound=bound,
+        covariant=covariant,
+        contravariant=contravariant,
+    )
+
+
+def _make_forward_ref(arg: str, is_argument: bool, module, is_class: bool):
+    return ForwardRef(arg, is_argument, module, is_class=is_class)
+
+
+def _make_property(fget, fset, fdel, doc):
+    return property(fget, fset, fdel, doc)
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(
+        self,
+        file: IO[bytes],
+        entities: "_Entities",
+        shared: "_Shared | None" = None,
+    ) -> None:
+        super().__init__(file, protocol=_PROTOCOL)
+        self._entities = entities
+        self._shared = shared
+        # if set, classes pickled by value get created without their state
+        # and collected here instead, see _dump
+        self.deferred_classes: list[type] | None = None
+        # called for every pickled object, isinstance is slow for ABCs
+        self._is_entity: dict[type, bool] = {}
+
+    def persistent_id(self, obj: Any) -> Any:
+        t = type(obj)
+        is_entity = self._is_entity.get(t)
+        if is_entity is None:
+            is_entity = self._is_entity[t] = issubclass(t, _ENTITY_TYPES)
+        if is_entity:
+            return self._entities.ref(obj)
+        if self._shared is not None:
+            return self._shared.ref(obj)
+        return None
+
+    def reducer_override(self, obj: Any) -> Any:
+        if obj is _EMPTY_CELL:
+            return _empty_cell, ()
+        if isinstance(obj, type):
+            if _importable(obj):
+                return NotImplemented
+            factory_call = obj.__dict__.get("_factory_call")
+            if factory_call is not None:
+                factory, args = factory_call
+                return _factory_class, (factory.__module__, factory.__qualname__, args)
+            return self._reduce_class(obj)
+        if isinstance(obj, types.FunctionType):
+            if _importable(obj):
+                return NotImplemented
+            return self._reduce_function(obj)
+        if isinstance(obj, TypeVar):
+            if _importable(obj):
+                return NotImplemented
+            return _make_typevar, (
+                obj.__name__,
+                obj.__bound__,
+                obj.__constraints__,
+                obj.__covariant__,
+                obj.__contravariant__,
+            )
+        if isinstance(obj, ForwardRef):
+            # would pickle its compiled code
+            return _make_forward_ref, (
+                obj.__forward_arg__,
+                obj.__forward_is_argument__,
+                obj.__forward_module__,
+                obj.__forward_is_class__,
+            )
+        if isinstance(obj, types.CodeType):
+            return marshal.loads, (marshal.dumps(obj),)
+        if isinstance(obj, types.ModuleType):
+            return importlib.import_module, (obj.__name__,)
+        if isinstance(obj, property):
+            return _make_property, (obj.fget, obj.fset, obj.fdel, obj.__doc__)
+        if isinstance(obj, (staticmethod, classmethod)):
+            return type(obj), (obj.__func__,)
+        return NotImplemented
+
+    def _reduce_class(self, cls: type):
+        args = (
+            type(cls),
+            cls.__name__,
+            cls.__bases__,
+            cls.__module__,
+            cls.__qualname__,
+        )
+        if self.deferred_classes is not None:
+            self.deferred_classes.append(cls)
+            return _make_class, args
+        return (_make_class, args, _class_state(cls), None, None, _set_class_state)
+
+    @staticmethod
+    def _reduce_function(func: types.FunctionType):
+        # __module__ can be changed (e.g by functools.wraps), globals can't
+        module = func.__globals__.get("__name__")
+        if func.__globals__ is not vars(sys.modules.get(module, sys)):
+            raise SnapshotError(f"Can't snapshot function with foreign globals {func}")
+        attrs = {
+            "__module__": func.__module__,
+            "__name__": func.__name__,
+            "__qualname__": func.__qualname__,
+            "__defaults__": func.__defaults__,
+            "__kwdefaults__": func.__kwdefaults__,
+            "__annotations__": func.__annotations__,
+            "__doc__": func.__doc__,
+            "__type_params__": func.__type_params__,
+            **func.__dict__,
+        }
+        cells = []
+        for cell in func.__closure__ or ():
+            try:
+                cells.append(cell.cell_contents)
+            except ValueError:
+                cells.append(_EMPTY_CELL)
+        return (
+            _make_function,
+            (
+                func.__code__,
+                module,
+                len(cells),
+            ),
+            (attrs, cells),
+            None,
+            None,
+            _set_function_state,
+        )
+
+
+def _value_hash_deps(obj: Any) -> list[Any]:
+    """
+    Hash-by-value entities in the (nested) containers of the attributes of obj
+    """
+    out = []
+    stack = list(vars(obj).values())
+    while stack:
+        v = stack.pop()
+        if isinstance(v, _ENTITY_TYPES):
+            if _has_value_hash(v):
+                out.append(v)
+        elif isinstance(v, (list, tuple, set, frozenset)):
+            stack.extend(v)
+        elif isinstance(v, dict):
+            stack.extend(v.keys())
+            stack.extend(v.values())
+    return out
+
+
+class _Entities:
+    """
+    Entity table of the dumping side
+    """
+
+    def __init__(self) -> None:
+        self.objs: list[Any] = []
+        self._ids: dict[int, int] = {}
+        self.seed_cnt = 0
+
+    def ref(self, obj: Any) -> int:
+        idx = self._ids.get(id(obj))
+        if idx is None:
+            idx = self._ids[id(obj)] = len(self.objs)
+            self.objs.append(obj)
+        return idx
+
+    def seed(self, root: Any) -> list[Any]:
+        """
+        Hash-by-value objects (e.g. Constant) have to be restored before they end
+        up in any set or dict key, thus they go first (and after the objects
+        their hash depends on).
+        """
+        if isinstance(root, Node):
+            G = root.get_graph()
+        elif isinstance(root, Graph):
+            G = root
+        else:
+            raise SnapshotError(f"Can't snapshot {type(root).__name__}")
+
+        order: list[Any] = []
+        done: set[int] = set()
+
+        def visit(obj: Any):
+            if id(obj) in done:
+                return
+            done.add(id(obj))
+            for dep in _value_hash_deps(obj):
+                visit(dep)
+            order.append(obj)
+
+        for gif in G:
+            node = gif._node
+            if node is not None and _has_value_hash(node):
+                visit(node)
+
+        # entities get registered when the seed gets pickled
+        return [root, *order]
+
+
+class _Shared:
+    """
+    Objects that are referenced instead of copied when pickling within the
+    process (see Prototype).
+    These are importable objects and classes/functions that are not bound to
+    a specific entity (e.g the holder classes created by Node.GIFS, but not the
+    ones created in a Node's __init__ holding its children).
+    """
+
+    _TYPES = (
+        type,
+        types.FunctionType,
+        types.CodeType,
+        types.ModuleType,
+        TypeVar,
+        ForwardRef,
+    )
+
+    def __init__(self) -> None:
+        self.objs: list[Any] = []
+        self._ids: dict[int, int | None] = {}
+        self._decided: dict[int, bool] = {}
+        self._in_progress: set[int] = set()
+        self._assumed = False
+
+    def ref(self, obj: Any) -> int | None:
+        if not isinstance(obj, self._TYPES):
+            return None
+        key = id(obj)
+        if key in self._ids:
+            return self._ids[key]
+
+        idx = None
+        if self._is_shared(obj):
+            idx = -1 - len(self.objs)
+            self.objs.append(obj)
+        self._ids[key] = idx
+        return idx
+
+    def _is_shared(self, obj: Any) -> bool:
+        key = id(obj)
+        decided = self._decided.get(key)
+        if decided is not None:
+            return decided
+        if key in self._in_progress:
+            # cycle (e.g __class__ cell), assume shared until proven otherwise
+            self._assumed = True
+            return True
+
+        if isinstance(obj, type):
+            if _importable(obj) or "_factory_call" in obj.__dict__:
+                return True
+            values = [v for k, v in vars(obj).items() if not k.startswith("_abc_")]
+        elif isinstance(obj, types.FunctionType):
+            if _importable(obj):
+                return True
+            values = [*(obj.__defaults__ or ()), *(obj.__kwdefaults__ or {}).values()]
+            for cell in obj.__closure__ or ():
+                try:
+                    values.append(cell.cell_contents)
+                except ValueError:
+                    pass
+        else:
+            return True
+
+        self._in_progress.add(key)
+        outer_assumed, self._assumed = self._assumed, False
+        shared = not self._refs_unshared(values)
+        self._in_progress.discard(key)
+
+        # a result based on an assumption about an unfinished object
+        # is only final once the outermost object is done
+        if not shared or not self._assumed or not self._in_progress:
+            self._decided[key] = shared
+            self._assumed = outer_assumed
+        else:
+            self._assumed = True
+        return shared
+
+    def _refs_unshared(self, values: list[Any]) -> bool:
+        seen: set[int] = set()
+        stack = values
+        while stack:
+            v = stack.pop()
+            if isinstance(v, _ENTITY_TYPES):
+                return True
+            if id(v) in seen:
+                continue
+            seen.add(id(v))
+            if isinstance(v, (type, types.FunctionType)):
+                if not self._is_shared(v):
+                    return True
+            elif isinstance(v, (list, tuple, set, frozenset)):
+                stack.extend(v)
+            elif isinstance(v, dict):
+                stack.extend(v.keys())
+                stack.extend(v.values())
+            elif isinstance(v, property):
+                stack.extend((v.fget, v.fset, v.fdel))
+            elif isinstance(v, (staticmethod, classmethod)):
+                stack.append(v.__func__)
+            elif hasattr(v, "__dict__") and not isinstance(v, types.ModuleType):
+                stack.extend(vars(v).values())
+        return False
+
+
+def _set_state(obj: Any, state: Any):
+    setstate = getattr(type(obj), "__setstate__", None)
+    if setstate is not None:
+        setstate(obj, state)
+        return
+
+    slots = None
+    if isinstance(state, tuple):
+        state, slots = state
+    if state:
+        obj.__dict__.update(state)
+    if slots:
+        for k, v in slots.items():
+            setattr(obj, k, v)
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Restoring allocates lots of objects at once, which would trigger the
+    cyclic garbage collector over and over without finding anything
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _discover(obj: Node | Graph, shared: _Shared | None = None) -> _Entities:
+    """
+    Registers all entities reachable from obj (and the shared objects),
+    by pickling everything once without keeping the output
+    """
+    entities = _Entities()
+    pickler = _Pickler(io.BytesIO(), entities, shared)
+    pickler.dump(entities.seed(obj))
+    entities.seed_cnt = len(entities.objs)
+
+    objs = entities.objs
+    i = 0
+    # entity table grows while pickling
+    while i < len(objs):
+        pickler.dump(objs[i].__getstate__())
+        i += 1
+
+    logger.debug(f"Snapshot of {obj}: {len(objs)} entities")
+    return entities
+
+
+def _dump_states(pickler: _Pickler, entities: _Entities):
+    objs, seed_cnt = entities.objs, entities.seed_cnt
+    # hash-by-value objects one by one, see _Entities.seed
+    for obj in objs[:seed_cnt]:
+        pickler.dump(obj.__getstate__())
+    pickler.dump([obj.__getstate__() for obj in objs[seed_cnt:]])
+
+
+def _load_states(unpickler: pickle.Unpickler, objs: list[Any], seed_cnt: int):
+    for obj in objs[:seed_cnt]:
+        _set_state(obj, unpickler.load())
+    for obj, state in zip(objs[seed_cnt:], unpickler.load()):
+        _set_state(obj, state)
+
+
+@_gc_paused()
+def _dump(obj: Node | Graph, file: IO[bytes]):
+    entities = _discover(obj)
+    pickler = _Pickler(file, entities)
+
+    pickler.deferred_classes = deferred = []
+    pickler.dump(([type(o) for o in entities.objs], entities.seed_cnt))
+    # classes can reference entities, so their state goes after the allocation
+    pickler.deferred_classes = None
+    pickler.dump([(cls, _class_state(cls)) for cls in deferred])
+
+    _dump_states(pickler, entities)
+
+
+@_gc_paused()
+def _load(file: IO[bytes]) -> Any:
+    unpickler = pickle.Unpickler(file)
+    objs: list[Any] = []
+    unpickler.persistent_load = objs.__getitem__  # type: ignore
+
+    types_, seed_cnt = unpickler.load()
+    objs.extend(object.__new__(t) for t in types_)
+    for cls, state in unpickler.load():
+        _set_class_state(cls, state)
+
+    _load_states(unpickler, objs, seed_cnt)
+    return objs[0]
+
+
+def dump(obj: Node | Graph, file: IO[bytes]):
+    """
+    Write a snapshot of everything reachable from obj to a binary file
+    """
+    file.write(_HEADER.pack(MAGIC, VERSION, *sys.version_info[:2]))
+    _dump(obj, file)
+
+
+def load(file: IO[bytes]) -> Any:
+    """
+    Restore the object written by dump (with everything reachable from it).
+    Runs arbitrary code from the file, only load trusted snapshots.
+    """
+    header = file.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise SnapshotError("Not a snapshot: too short")
+    magic, version, major, minor = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise SnapshotError("Not a snapshot: bad magic")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version} != {VERSION}")
+    if (major, minor) != sys.version_info[:2]:
+        raise SnapshotError(
+            f"Snapshot was written by python {major}.{minor},"
+            f" can't load it in {sys.version_info[0]}.{sys.version_info[1]}"
+        )
+
+    return _load(file)
+
+
+def dumps(obj: Node | Graph) -> bytes:
+    buf = io.BytesIO()
+    dump(obj, buf)
+    return buf.getvalue()
+
+
+def loads(data: bytes) -> Any:
+    return load(io.BytesIO(data))
+
+
+def save(obj: Node | Graph, path: Path):
+    with path.open("wb") as f:
+        dump(obj, f)
+
+
+def restore(path: Path) -> Any:
+    with path.open("rb") as f:
+        return load(f)
+
+
+class Prototype[T: Node]:
+    """
+    Builds a node once and clones it for every further instance.
+    Cloning copies the prototype's nodes, GIFs, links, traits and parameters
+    without running their __init__.
+
+    The prototype has to be self-contained (not connected to anything outside
+    of its own children), else the clones would copy the connected nodes as well.
+    Classes and functions not bound to the prototype are shared with the clones.
+    """
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        proto = factory()
+
+        # besides its children only parameters (narrowing) may be connected
+        for gif in proto.get_graph():
+            node = gif._node
+            root = node and node._get_hierarchy()[0][0]
+            assert (
+                root is None or root is proto or isinstance(root, Parameter)
+            ), f"Prototype {proto} is connected to {node}"
+
+        # the first pass registers all entities and shared objects
+        # so the second one only writes indexes
+        shared = _Shared()
+        entities = _discover(proto, shared)
+
+        buf = io.BytesIO()
+        _dump_states(_Pickler(buf, entities, shared), entities)
+
+        self._data = buf.getvalue()
+        self._types = [type(obj) for obj in entities.objs]
+        self._seed_cnt = entities.seed_cnt
+        # see _Shared.ref for the indexes
+        self._shared = shared.objs[::-1]
+
+    @_gc_paused()
+    def clone(self) -> T:
+        objs = [object.__new__(t) for t in self._types]
+        unpickler = pickle.Unpickler(io.BytesIO(self._data))
+        unpickler.persistent_load = (objs + self._shared).__getitem__  # type: ignore
+        _load_states(unpickler, objs, self._seed_cnt)
+        return objs[0]
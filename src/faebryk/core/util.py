@@ -11,6 +11,7 @@ from typing import (
     SupportsFloat,
     cast,
 )
+from weakref import WeakKeyDictionary
 
 from faebryk.core.core import (
     Graph,
@@ -176,8 +177,17 @@ def get_parameter_max(param: Parameter):
 # Graph Querying -----------------------------------------------------------------------
 
 
-def bfs_node(node: Node, filter: Callable[[GraphInterface], bool]):
-    return get_nodes_from_gifs(node.get_graph().bfs_visit(filter, [node.GIFs.self]))
+def bfs_node(
+    node: Node,
+    filter: Callable[[GraphInterface], bool] | None,
+    types: type[GraphInterface] | tuple[type[GraphInterface], ...] | None = None,
+    exclude: Iterable[GraphInterface] = (),
+):
+    return get_nodes_from_gifs(
+        node.get_graph().bfs_visit(
+            filter, [node.GIFs.self], types=types, exclude=exclude
+        )
+    )
 
 
 def get_nodes_from_gifs(gifs: Iterable[GraphInterface]):
@@ -194,7 +204,7 @@ def node_projected_graph(g: Graph) -> set[Node]:
     """
     Don't call this directly, use get_all_nodes_by/of/with instead
     """
-    return get_nodes_from_gifs(g.subgraph_type(GraphInterfaceSelf))
+    return set(g.get_index(Node.TYPE_INDEX).get(Node))
 
 
 @deprecated("Use get_node_children_all")
@@ -207,8 +217,9 @@ def get_node_children_all(node: Node, include_root=True) -> list[Node]:
 
     out = bfs_node(
         node,
-        lambda x: isinstance(x, (GraphInterfaceSelf, GraphInterfaceHierarchical))
-        and x is not node.GIFs.parent,
+        None,
+        types=(GraphInterfaceSelf, GraphInterfaceHierarchical),
+        exclude=[node.GIFs.parent],
     )
 
     if not include_root:
@@ -230,7 +241,9 @@ def get_all_nodes_with_trait[T: Trait](
     g: Graph, trait: type[T]
 ) -> list[tuple[Node, T]]:
     return [
-        (n, n.get_trait(trait)) for n in node_projected_graph(g) if n.has_trait(trait)
+        (n, n.get_trait(trait))
+        for n in g.get_index(Node.TRAIT_INDEX).get(trait)
+        if n.has_trait(trait)
     ]
 
 
@@ -240,7 +253,11 @@ def get_all_nodes_with_traits[*Ts](
 ):  # -> list[tuple[Node, tuple[*Ts]]]:
     return [
         (n, tuple(n.get_trait(trait) for trait in traits))
-        for n in node_projected_graph(g)
+        for n in (
+            g.get_index(Node.TRAIT_INDEX).get(traits[0])
+            if traits
+            else node_projected_graph(g)
+        )
         if all(n.has_trait(trait) for trait in traits)
     ]
 
@@ -254,11 +271,11 @@ def get_all_nodes_by_names(g: Graph, names: Iterable[str]) -> list[tuple[Node, s
 
 
 def get_all_nodes_of_type[T: Node](g: Graph, t: type[T]) -> set[T]:
-    return {n for n in node_projected_graph(g) if isinstance(n, t)}
+    return set(g.get_index(Node.TYPE_INDEX).get(t))
 
 
 def get_all_nodes_of_types(g: Graph, t: tuple[type[Node], ...]) -> set[Node]:
-    return {n for n in node_projected_graph(g) if isinstance(n, t)}
+    return set(g.get_index(Node.TYPE_INDEX).get(t))
 
 
 def get_all_connected(gif: GraphInterface) -> list[tuple[GraphInterface, Link]]:
@@ -271,6 +288,10 @@ def get_connected_mifs(gif: GraphInterface):
 
 def get_connected_mifs_with_link(gif: GraphInterface):
     assert isinstance(gif.node, ModuleInterface)
+
+    if gif is gif.node.GIFs.connected:
+        return gif.node.get_connected()
+
     connections = get_all_connected(gif)
 
     # check if ambiguous links between mifs
@@ -299,6 +320,80 @@ def get_net(mif: Electrical):
     return next(iter(nets))
 
 
+class ElectricalNets:
+    """
+    Partition of all Electrical interfaces of a graph into connected groups,
+    see get_electrical_nets
+    """
+
+    def __init__(self, groups: list[frozenset[Electrical]]) -> None:
+        from faebryk.library.Net import Net
+
+        self.groups = groups
+        self._group_of = {id(el): i for i, group in enumerate(groups) for el in group}
+        # Nets attached to each group (via their part_of)
+        self.nets: list[set[Net]] = [
+            {
+                net
+                for el in group
+                if (p := el.get_parent())
+                and isinstance(net := p[0], Net)
+                and net.IFs.part_of is el
+            }
+            for group in groups
+        ]
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def _index(self, el: Electrical) -> int:
+        return self._group_of[id(el)]
+
+    def get_group(self, el: Electrical) -> frozenset[Electrical]:
+        return self.groups[self._index(el)]
+
+    def get_nets(self, el: Electrical):
+        return self.nets[self._index(el)]
+
+    def is_connected(self, lhs: Electrical, rhs: Electrical) -> bool:
+        return self._index(lhs) == self._index(rhs)
+
+
+# graph representative -> (graph size, nets), see get_electrical_nets
+_electrical_nets: WeakKeyDictionary[Graph, tuple[tuple[int, int], ElectricalNets]] = (
+    WeakKeyDictionary()
+)
+
+
+def get_electrical_nets(G: Graph) -> ElectricalNets:
+    """
+    All Electrical interfaces of the graph grouped by connectivity, in one pass.
+    Connections are transitive (see ModuleInterface.get_connected), so each group
+    is only resolved once instead of once per interface.
+    The result is cached until the graph changes.
+    """
+    root = G.representative
+    state = (G.node_cnt, G.edge_cnt)
+    cached = _electrical_nets.get(root)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    groups = []
+    resolved: set[Electrical] = set()
+    for el in get_all_nodes_of_type(G, Electrical):
+        if el in resolved:
+            continue
+        group = frozenset(
+            [el, *(mif for mif in el.get_connected() if isinstance(mif, Electrical))]
+        )
+        resolved.update(group)
+        groups.append(group)
+
+    out = ElectricalNets(groups)
+    _electrical_nets[root] = state, out
+    return out
+
+
 def get_children[T: Node](
     node: Node,
     direct_only: bool,
@@ -330,8 +425,9 @@ def get_node_direct_mods_or_mifs(node: Node, include_mifs: bool = True):
 def get_node_direct_children_(node: Node):
     return {
         gif.node
-        for gif, link in node.get_graph().get_edges(node.GIFs.children).items()
-        if isinstance(link, LinkNamedParent)
+        for gif in node.get_graph().get_edges_by_type(
+            node.GIFs.children, LinkNamedParent
+        )
     }
 
 
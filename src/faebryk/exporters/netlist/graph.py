@@ -9,6 +9,7 @@ from faebryk.core.core import Graph, Module
 from faebryk.core.util import (
     get_all_nodes_with_trait,
     get_connected_mifs,
+    get_electrical_nets,
 )
 from faebryk.exporters.netlist.netlist import T2Netlist
 from faebryk.library.Electrical import Electrical
@@ -148,9 +149,20 @@ def attach_nets_and_kicad_info(g: Graph):
             continue
         fp.add_trait(can_represent_kicad_footprint_via_attached_component(n, Gclosed))
 
+    # partition once, the nets created below don't change the groups
+    el_nets = get_electrical_nets(Gclosed)
+    created: dict[frozenset[Electrical], Net] = {}
     for fp in node_fps.values():
-        # TODO use graph
         for mif in fp.IFs.get_all():
             if not isinstance(mif, Pad):
                 continue
-            add_or_get_net(mif.IFs.net)
+            interface = mif.IFs.net
+            nets = el_nets.get_nets(interface)
+            if len(nets) > 1:
+                raise Exception(f"Multiple nets interconnected: {nets}")
+            if nets:
+                continue
+            group = el_nets.get_group(interface)
+            if group not in created:
+                net = created[group] = Net()
+                net.IFs.part_of.connect(interface)
@@ -6,6 +6,7 @@ from pathlib import Path
 
 from faebryk.core.core import Module, Parameter
 from faebryk.core.util import get_all_modules
+from faebryk.libs.app.parameters import resolve_parameters
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +16,13 @@ def export_parameters_to_file(module: Module, path: Path):
 
     # {module_name: [{param_name: param_value}, {param_name: param_value},...]}
     parameters = dict[str, list[dict[str, Parameter]]]()
+    resolved = resolve_parameters(module.get_most_special())
 
     for m in {
         _m.get_most_special() for _m in get_all_modules(module.get_most_special())
     }:
         parameters[m.get_full_name(types=True).split(".", maxsplit=1)[-1]] = [
-            {param.get_full_name().split(".")[-1]: param}
+            {param.get_full_name().split(".")[-1]: resolved[param]}
             for param in m.PARAMs.get_all()
         ]
 
@@ -15,6 +15,8 @@ class ANY(Generic[PV], Parameter[PV]):
     Don't mistake with TBD.
     """
 
+    _literal = True
+
     def __init__(self) -> None:
         super().__init__()
 
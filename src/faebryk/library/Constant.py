@@ -1,7 +1,9 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
+import math
 from typing import Generic, Self, SupportsAbs, TypeVar
+from weakref import WeakValueDictionary
 
 from faebryk.core.core import Parameter
 from faebryk.library.is_representable_by_single_value_defined import (
@@ -12,11 +14,42 @@ PV = TypeVar("PV")
 
 
 class Constant(Generic[PV], Parameter[PV]):
+    _literal = True
+    # (type, value type, value[, sign]) -> interned constant, see intern
+    _interned_by_value: WeakValueDictionary[tuple, "Constant"] = WeakValueDictionary()
+
     def __init__(self, value: PV) -> None:
         super().__init__()
         self.value = value
         self.add_trait(is_representable_by_single_value_defined(self.value))
 
+    @classmethod
+    def intern(cls, value: PV) -> Self:
+        """
+        Constant shared by all callers interning an equal value (of the same type),
+        as long as it is referenced.
+        Interned constants can't be attached to a node or narrowed, merging with them
+        narrows with a copy instead.
+        NaN is never interned.
+        """
+        # value type keeps e.g 1, 1.0 and True apart, sign keeps 0.0 and -0.0 apart
+        key = (cls, type(value), value)
+        if isinstance(value, float):
+            key += (math.copysign(1, value),)
+        try:
+            out = Constant._interned_by_value.get(key)
+        except TypeError:
+            # unhashable values can't be shared
+            return cls(value)
+        if out is None:
+            # NaN never equals itself and so would never be found again
+            if value != value:
+                return cls(value)
+            out = cls(value)
+            out._interned = True
+            Constant._interned_by_value[key] = out
+        return out
+
     def __str__(self) -> str:
         return super().__str__() + f"({self.value})"
 
@@ -24,6 +57,8 @@ class Constant(Generic[PV], Parameter[PV]):
         return super().__repr__() + f"({self.value})"
 
     def __eq__(self, other) -> bool:
+        if other is self:
+            return True
         if not isinstance(other, Constant):
             return False
 
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import operator
 import typing
 from textwrap import indent
 from typing import Generic, TypeVar
@@ -59,7 +60,9 @@ class Operation(Generic[PV], Parameter[PV]):
         )
 
     def execute(self):
-        operands = [o.get_most_narrow() for o in self.operands]
+        return self._execute([o.get_most_narrow() for o in self.operands])
+
+    def _execute(self, operands: list[Parameter[PV]]):
         out = self.operation(*operands)
         if isinstance(out, Operation):
             raise Operation.OperationNotExecutable()
@@ -67,11 +70,30 @@ class Operation(Generic[PV], Parameter[PV]):
         logger.debug(f"{operands=} resolved to {out}")
         return out
 
+    # narrowest operands of the last failed execute
+    _not_executable: list[Parameter] | None = None
+
     def get_most_narrow(self) -> Parameter[PV]:
         out = super().get_most_narrow()
-        if out is self:
-            try:
-                return self.execute()
-            except Operation.OperationNotExecutable:
-                pass
+        if out is not self:
+            return out
+
+        # the result only depends on the narrowest operands,
+        # nothing changed if they are still the same
+        operands = [o.get_most_narrow() for o in self.operands]
+        failed = self._not_executable
+        if failed is not None and all(map(operator.is_, operands, failed)):
+            return self
+
+        try:
+            return self._execute(operands)
+        except Operation.OperationNotExecutable:
+            self._not_executable = operands
         return out
+
+    def __getstate__(self):
+        state, slots = super().__getstate__()
+        if state and "_not_executable" in state:
+            state = dict(state)
+            del state["_not_executable"]
+        return state, slots
@@ -2,14 +2,16 @@
 # SPDX-License-Identifier: MIT
 
 from math import inf
-from typing import Any, Generic, Protocol, Self, TypeVar
+from typing import Any, Generic, Iterable, Protocol, Self, TypeVar
 
+import numpy as np
 from faebryk.core.core import Parameter
 from faebryk.library.Constant import Constant
 from faebryk.library.is_representable_by_single_value_defined import (
     is_representable_by_single_value_defined,
 )
 from faebryk.libs.exceptions import FaebrykException
+from faebryk.libs.intervals import Intervals
 
 X = TypeVar("X", bound="_SupportsRangeOps")
 
@@ -32,6 +34,8 @@ PV = TypeVar("PV", bound=_SupportsRangeOps)
 
 
 class Range(Generic[PV], Parameter[PV]):
+    _literal = True
+
     def __init__(self, bound1: PV, bound2: PV) -> None:
         super().__init__()
 
@@ -43,7 +47,7 @@ class Range(Generic[PV], Parameter[PV]):
             bound2 = bound2.max
 
         self.bounds = tuple(
-            bound if isinstance(bound, Parameter) else Constant(bound)
+            bound if isinstance(bound, Parameter) else Constant.intern(bound)
             for bound in (bound1, bound2)
         )
 
@@ -68,6 +72,17 @@ class Range(Generic[PV], Parameter[PV]):
     def contains(self, value_to_check: PV) -> bool:
         return self.min <= value_to_check <= self.max
 
+    def contains_all(self, values: Iterable[float] | Intervals) -> np.ndarray:
+        """
+        Vectorized contains for many numeric values (or intervals) at once
+        """
+        if not isinstance(values, Intervals):
+            values = Intervals(np.fromiter(values, dtype=np.float64))
+        return self.as_intervals().contains(values)
+
+    def as_intervals(self) -> Intervals:
+        return Intervals.of([self])
+
     def as_tuple(self) -> tuple[PV, PV]:
         return (self.min, self.max)
 
@@ -4,11 +4,14 @@
 from typing import Generic, Iterable, Self, TypeVar
 
 from faebryk.core.core import Parameter
+from faebryk.libs.intervals import Intervals
 
 PV = TypeVar("PV")
 
 
 class Set(Generic[PV], Parameter[PV]):
+    _literal = True
+
     def __init__(self, params: Iterable[Parameter]) -> None:
         super().__init__()
         self.params = Set.flatten(set(params))
@@ -19,6 +22,18 @@ class Set(Generic[PV], Parameter[PV]):
             x for p in params if isinstance(p, Set) for x in Set.flatten(p.params)
         )
 
+    @classmethod
+    def from_values(cls, values: Iterable[PV]) -> Self:
+        from faebryk.library.Constant import Constant
+
+        return cls(Constant.intern(v) for v in values)
+
+    def as_intervals(self) -> Intervals:
+        """
+        Numeric params of the set, raises TypeError for other params
+        """
+        return Intervals.of(self.params)
+
     def __str__(self) -> str:
         return super().__str__() + f"({self.params})"
 
@@ -1,7 +1,6 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
-from functools import cache
 from typing import Generic, TypeGuard, TypeVar
 
 from faebryk.core.core import Module, ModuleInterface
@@ -12,7 +11,7 @@ from faebryk.library.can_bridge_defined import can_bridge_defined
 from faebryk.library.has_designator_prefix_defined import (
     has_designator_prefix_defined,
 )
-from faebryk.libs.util import times
+from faebryk.libs.util import class_factory, times
 
 T = TypeVar("T", bound=ModuleInterface)
 
@@ -27,7 +26,8 @@ class _TSwitch(Generic[T], Module):
         return isinstance(obj, _TSwitch) and issubclass(obj.t, t)
 
 
-@cache  # This means we can use a normal "isinstance" to test for them
+# memoized, so we can use a normal "isinstance" to test for them
+@class_factory
 def Switch(interface_type: type[T]):
     class _Switch(_TSwitch[interface_type]):
         def __init__(self) -> None:
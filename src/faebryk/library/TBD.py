@@ -9,6 +9,8 @@ PV = TypeVar("PV")
 
 
 class TBD(Generic[PV], Parameter[PV]):
+    _literal = True
+
     def __init__(self) -> None:
         super().__init__()
 
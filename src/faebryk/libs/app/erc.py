@@ -9,6 +9,7 @@ from faebryk.core.core import Graph, Module, ModuleInterface
 from faebryk.core.util import (
     get_all_nodes_of_type,
     get_all_nodes_of_types,
+    get_electrical_nets,
 )
 from faebryk.library.has_overriden_name import has_overriden_name
 from faebryk.libs.picker.picker import has_part_picked
@@ -62,25 +63,21 @@ def simple_erc(G: Graph):
 
     logger.info("Checking graph for ERC violations")
 
+    el_nets = get_electrical_nets(G)
+
     # power short
     electricpower = get_all_nodes_of_type(G, ElectricPower)
     logger.info(f"Checking {len(electricpower)} Power")
     for ep in electricpower:
-        if ep.IFs.lv.is_connected_to(ep.IFs.hv):
+        if el_nets.is_connected(ep.IFs.lv, ep.IFs.hv):
             raise ERCFaultShort([ep], "shorted power")
 
     # shorted nets
     nets = get_all_nodes_of_type(G, Net)
     logger.info(f"Checking {len(nets)} nets")
     for net in nets:
-        collisions = {
-            p[0]
-            for mif in net.IFs.part_of.get_direct_connections()
-            if (p := mif.get_parent()) and isinstance(p[0], Net)
-        }
-
-        if collisions:
-            shorted = collisions | {net}
+        shorted = el_nets.get_nets(net.IFs.part_of)
+        if len(shorted) > 1:
             raise ERCFaultShort(
                 [n.IFs.part_of for n in shorted], f"shorted nets: {shorted}"
             )
@@ -120,7 +117,7 @@ def simple_erc(G: Graph):
             and comp.get_trait(has_part_picked).get_part().partno == "REMOVE"
         ):
             continue
-        if comp.IFs.unnamed[0].is_connected_to(comp.IFs.unnamed[1]):
+        if el_nets.is_connected(*comp.IFs.unnamed):
             raise ERCFaultShort(comp.IFs.unnamed, "shorted component")
 
     ## unmapped Electricals
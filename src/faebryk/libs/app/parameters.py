@@ -2,15 +2,125 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+from typing import Iterable, Iterator, Mapping
+from weakref import WeakKeyDictionary
 
-from faebryk.core.core import Module
-from faebryk.core.util import get_all_modules
+from faebryk.core.core import Module, Node, Parameter
+from faebryk.core.util import get_all_modules, get_children
 from faebryk.library.ANY import ANY
+from faebryk.library.Operation import Operation
 from faebryk.library.TBD import TBD
 
 logger = logging.getLogger(__name__)
 
 
+class ResolvedParameters(Mapping[Parameter, Parameter]):
+    """
+    Most narrow parameter of each parameter (by identity)
+    """
+
+    def __init__(self, params: Iterable[Parameter]) -> None:
+        self._narrowest = {id(p): (p, p.get_most_narrow()) for p in params}
+
+    def __getitem__(self, param: Parameter) -> Parameter:
+        return self._narrowest[id(param)][1]
+
+    def __iter__(self) -> Iterator[Parameter]:
+        return (p for p, _ in self._narrowest.values())
+
+    def __len__(self) -> int:
+        return len(self._narrowest)
+
+
+# module -> (state of the design, resolved parameters), see resolve_parameters
+_resolved: WeakKeyDictionary[Module, tuple[tuple, ResolvedParameters]] = (
+    WeakKeyDictionary()
+)
+
+
+def _operations_in_dependency_order(ops: Iterable[Operation]) -> list[Operation]:
+    """
+    Not yet executed operations (reachable from ops), each after the operations
+    its operands are narrowed by
+    """
+
+    def deps(op: Operation) -> list[Operation]:
+        # _get_most_narrow does not execute operations
+        return [
+            dep
+            for operand in op.operands
+            if isinstance(dep := operand._get_most_narrow(), Operation)
+            and dep is not op
+        ]
+
+    out = []
+    seen = set()
+    for root in ops:
+        if id(root) in seen or root._get_most_narrow() is not root:
+            continue
+        seen.add(id(root))
+        stack = [(root, iter(deps(root)))]
+        while stack:
+            op, it = stack[-1]
+            dep = next(it, None)
+            if dep is None:
+                stack.pop()
+                out.append(op)
+            elif id(dep) not in seen:
+                seen.add(id(dep))
+                stack.append((dep, iter(deps(dep))))
+
+    return out
+
+
+def _get_parameters(module: Module) -> list[Parameter]:
+    """
+    Parameters in the hierarchy of the given module, including the ones of its
+    specialized modules, which don't have to be attached to it
+    """
+    nodes: set[Node] = set()
+    todo = [module]
+    while todo:
+        children = get_children(todo.pop(), direct_only=False, include_root=True)
+        nodes |= children
+        todo.extend(
+            special
+            for m in children
+            if isinstance(m, Module) and (special := m.get_most_special()) not in nodes
+        )
+    return [n for n in nodes if isinstance(n, Parameter)]
+
+
+def resolve_parameters(module: Module) -> ResolvedParameters:
+    """
+    Resolve all parameters of the given module and its children in one pass.
+
+    The operations they are narrowed by get executed once each, in dependency
+    order, instead of lazily on every get_most_narrow.
+    The result is cached until a parameter gets narrowed or the graph changes.
+    """
+    G = module.get_graph()
+    state = (Parameter._narrow_cnt, G.node_cnt, G.edge_cnt)
+    cached = _resolved.get(module)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    params = _get_parameters(module)
+    for op in _operations_in_dependency_order(
+        end for p in params if isinstance(end := p._get_most_narrow(), Operation)
+    ):
+        try:
+            op.execute()
+        except Operation.OperationNotExecutable:
+            pass
+
+    # executing operations adds their results to the graph
+    G = module.get_graph()
+    out = ResolvedParameters(params)
+    _resolved[module] = (Parameter._narrow_cnt, G.node_cnt, G.edge_cnt), out
+    return out
+
+
 def replace_tbd_with_any(module: Module, recursive: bool, loglvl: int | None = None):
     """
     Replace all TBD instances with ANY instances in the given module.
@@ -23,14 +133,20 @@ def replace_tbd_with_any(module: Module, recursive: bool, loglvl: int | None = N
         logger.setLevel(loglvl)
 
     module = module.get_most_special()
+    resolved = resolve_parameters(module)
 
-    for param in module.PARAMs.get_all():
-        if isinstance(param.get_most_narrow(), TBD):
-            logger.debug(f"Replacing in {module}: {param} with ANY")
-            param.merge(ANY())
-
-    logger.setLevel(lvl)
+    def replace(module: Module):
+        for param in module.PARAMs.get_all():
+            # replacing one TBD can narrow others
+            if isinstance(resolved[param], TBD) and isinstance(
+                param.get_most_narrow(), TBD
+            ):
+                logger.debug(f"Replacing in {module}: {param} with ANY")
+                param.merge(ANY())
 
+    replace(module)
     if recursive:
         for m in {_m.get_most_special() for _m in get_all_modules(module)}:
-            replace_tbd_with_any(m, recursive=False, loglvl=loglvl)
+            replace(m)
+
+    logger.setLevel(lvl)
@@ -1,9 +1,12 @@
 import logging
+from itertools import compress
 from math import ceil, floor, log10
 from typing import Tuple
 
 import faebryk.library._F as F
+import numpy as np
 from faebryk.core.core import Parameter
+from faebryk.libs.intervals import Intervals
 
 logger = logging.getLogger(__name__)
 
@@ -443,11 +446,13 @@ def e_series_intersect(
 
     assert isinstance(value, F.Range)
 
-    e_series_values = repeat_set_over_base(
-        e_series, 10, range(floor(log10(value.min)), ceil(log10(value.max)) + 1)
+    e_series_values = list(
+        repeat_set_over_base(
+            e_series, 10, range(floor(log10(value.min)), ceil(log10(value.max)) + 1)
+        )
     )
-    return range_set_intersect(
-        value, F.Set([F.Constant(e) for e in list(e_series_values)])
+    return F.Set.from_values(
+        compress(e_series_values, value.contains_all(e_series_values))
     )
 
 
@@ -459,15 +464,29 @@ def e_series_discretize_to_nearest(
 
     target = value.value if isinstance(value, F.Constant) else sum(value.as_tuple()) / 2
 
-    e_series_values = repeat_set_over_base(
-        e_series, 10, range(floor(log10(target)), ceil(log10(target)) + 1)
+    e_series_values = list(
+        repeat_set_over_base(
+            e_series, 10, range(floor(log10(target)), ceil(log10(target)) + 1)
+        )
     )
 
-    return F.Constant(min(e_series_values, key=lambda x: abs(x - target)))
+    return F.Constant(e_series_values[int(_nearest(e_series_values, target))])
+
+
+def _nearest(values: list[float], targets) -> np.ndarray:
+    """
+    Index of the value nearest to each target (first one on ties)
+    """
+    return np.argmin(np.abs(np.subtract.outer(targets, values)), axis=-1)
 
 
 def range_set_intersect(range_: F.Range, set_: F.Set) -> F.Set:
-    return F.Set([s for s in set_.params if range_.contains(s)])
+    params = list(set_.params)
+    try:
+        contained = range_.contains_all(Intervals.of(params))
+    except TypeError:
+        return F.Set([s for s in params if range_.contains(s)])
+    return F.Set(compress(params, contained))
 
 
 def e_series_ratio(
@@ -516,23 +535,28 @@ def e_series_ratio(
     rh_values = e_series_intersect(rh, e_values)
     rl_values = e_series_intersect(rl, e_values) if isinstance(rl, F.Range) else None
 
-    target_ratio = oir.as_center_tuple()[0]
-
-    solutions = []
-
-    for rh_val in rh_values.params:
-        rl_ideal = rh_val / (F.Constant(1) / target_ratio - 1)
-
-        rl_nearest_e_val = (
-            min(rl_values.params, key=lambda x: abs(x - rl_ideal))
-            if rl_values
-            else e_series_discretize_to_nearest(rl_ideal, e_values)
-        )
-        real_ratio = rl_nearest_e_val / (rh_val + rl_nearest_e_val)
-
-        solutions.append((real_ratio, (rh_val, rl_nearest_e_val)))
-
-    optimum = min(solutions, key=lambda x: abs(x[0] - target_ratio))
+    target_ratio = float(oir.as_center_tuple()[0])
+
+    # all candidates at once, (first) optimum same as iterating rh_values
+    rh_params = list(rh_values.params)
+    rh = np.array([p.value for p in rh_params], dtype=np.float64)
+    rl_ideal = rh / (1 / target_ratio - 1)
+
+    if rl_values:
+        rl_params = list(rl_values.params)
+        rl_params = [
+            rl_params[i] for i in _nearest([p.value for p in rl_params], rl_ideal)
+        ]
+    else:
+        rl_params = [
+            e_series_discretize_to_nearest(F.Constant(rl), e_values)
+            for rl in rl_ideal.tolist()
+        ]
+    rl = np.array([p.value for p in rl_params], dtype=np.float64)
+    real_ratio = rl / (rh + rl)
+
+    best = int(np.argmin(np.abs(real_ratio - target_ratio)))
+    optimum = (F.Constant(real_ratio[best].item()), (rh_params[best], rl_params[best]))
 
     logger.debug(
         f"{target_ratio=}, {optimum[0]=}, {oir}, "
@@ -0,0 +1,150 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+from typing import TYPE_CHECKING, Callable, Iterable, Self
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from faebryk.core.core import Parameter
+
+type _Operand = "Intervals | float | np.ndarray"
+
+
+class Intervals:
+    """
+    Array of closed numeric intervals [lo, hi], evaluated with numpy.
+
+    Constants are intervals with lo == hi.
+    Arithmetic follows Parameter.op (bounds combined pairwise, then sorted),
+    so results match doing the same ops on the single Range/Constant objects.
+    Intersections can be empty (lo > hi), see is_empty.
+    """
+
+    def __init__(self, lo: np.ndarray | Iterable[float], hi=None):
+        self.lo = np.asarray(lo, dtype=np.float64)
+        self.hi = self.lo if hi is None else np.asarray(hi, dtype=np.float64)
+        self.lo, self.hi = np.broadcast_arrays(self.lo, self.hi)
+
+    @classmethod
+    def of(cls, params: "Iterable[Parameter]") -> Self:
+        """
+        Intervals of (the most narrow) numeric Constants and Ranges.
+        Raises TypeError for any other parameter.
+        """
+        from faebryk.library.Constant import Constant
+        from faebryk.library.Range import Range
+
+        lo, hi = [], []
+        for p in params:
+            p = p.get_most_narrow()
+            if isinstance(p, Constant):
+                bounds = (p.value, p.value)
+            elif isinstance(p, Range):
+                bounds = p.min, p.max
+                bounds = tuple(
+                    b.value if isinstance(b, Constant) else b for b in bounds
+                )
+            else:
+                raise TypeError(f"Not an interval: {p}")
+            if not all(
+                isinstance(b, (int, float)) and not isinstance(b, bool) for b in bounds
+            ):
+                raise TypeError(f"Not numeric: {p}")
+            lo.append(bounds[0])
+            hi.append(bounds[1])
+
+        return cls(lo, hi)
+
+    def __len__(self) -> int:
+        return len(self.lo)
+
+    def __getitem__(self, key) -> Self:
+        return type(self)(self.lo[key], self.hi[key])
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(zip(self.lo, self.hi))})"
+
+    @staticmethod
+    def _bounds(other: _Operand) -> tuple[np.ndarray, np.ndarray]:
+        if isinstance(other, Intervals):
+            return other.lo, other.hi
+        other = np.asarray(other, dtype=np.float64)
+        return other, other
+
+    def _op(self, other: _Operand, op: Callable, twist: bool = False) -> Self:
+        o_lo, o_hi = self._bounds(other)
+        if twist:
+            lo, hi = op(o_lo, self.lo), op(o_hi, self.hi)
+        else:
+            lo, hi = op(self.lo, o_lo), op(self.hi, o_hi)
+        return type(self)(np.minimum(lo, hi), np.maximum(lo, hi))
+
+    def __add__(self, other: _Operand):
+        return self._op(other, np.add)
+
+    def __sub__(self, other: _Operand):
+        return self._op(other, np.subtract)
+
+    def __mul__(self, other: _Operand):
+        return self._op(other, np.multiply)
+
+    def __truediv__(self, other: _Operand):
+        return self._op(other, np.true_divide)
+
+    def __radd__(self, other: _Operand):
+        return self._op(other, np.add, twist=True)
+
+    def __rsub__(self, other: _Operand):
+        return self._op(other, np.subtract, twist=True)
+
+    def __rmul__(self, other: _Operand):
+        return self._op(other, np.multiply, twist=True)
+
+    def __rtruediv__(self, other: _Operand):
+        return self._op(other, np.true_divide, twist=True)
+
+    def is_empty(self) -> np.ndarray:
+        return self.lo > self.hi
+
+    def contains(self, other: _Operand) -> np.ndarray:
+        """
+        Whether the values/intervals of other lie within these (broadcasted)
+        """
+        o_lo, o_hi = self._bounds(other)
+        return (self.lo <= o_lo) & (o_hi <= self.hi)
+
+    def intersect(self, other: _Operand) -> Self:
+        o_lo, o_hi = self._bounds(other)
+        return type(self)(np.maximum(self.lo, o_lo), np.minimum(self.hi, o_hi))
+
+    def is_mergeable_with(self, other: _Operand) -> np.ndarray:
+        """
+        Same as Parameter.is_mergeable_with for Constants and Ranges:
+        ranges need to overlap, constants need to be contained/equal
+        """
+        return ~self.intersect(other).is_empty()
+
+    def merge(self, other: _Operand) -> Self:
+        """
+        Intersection of mergeable intervals,
+        raises Parameter.MergeException if any pair is conflicting
+        """
+        from faebryk.core.core import Parameter
+
+        out = self.intersect(other)
+        if np.any(out.is_empty()):
+            raise Parameter.MergeException("conflicting ranges")
+        return out
+
+    def to_params(self) -> "list[Parameter]":
+        """
+        Constants for single values, Ranges otherwise
+        """
+        from faebryk.library.Constant import Constant
+        from faebryk.library.Range import Range
+
+        return [
+            Constant.intern(lo) if lo == hi else Range(lo, hi)
+            for lo, hi in zip(self.lo.tolist(), self.hi.tolist())
+        ]
@@ -4,6 +4,7 @@
 import asyncio
 import datetime
 import logging
+import operator
 import os
 import struct
 import sys
@@ -21,6 +22,7 @@ from faebryk.libs.e_series import (
     ParamNotResolvedError,
     e_series_intersect,
 )
+from faebryk.libs.intervals import Intervals
 from faebryk.libs.picker.lcsc import (
     LCSC_NoDataException,
     LCSC_Part,
@@ -226,7 +228,7 @@ class Component(Model):
         value = si_str_to_float(value_field)
 
         if not use_tolerance:
-            return F.Constant(value)
+            return F.Constant.intern(value)
 
         if "Tolerance" not in self.extra["attributes"]:
             raise ValueError(f"No Tolerance field in component (lcsc: {self.lcsc})")
@@ -354,9 +356,29 @@ class Component(Model):
         attach(module, self.partno)
 
 
+def _is_more_specific_than_all(
+    params: Sequence[Parameter], other: Parameter
+) -> list[bool]:
+    """
+    Parameter.is_more_specific_than of each param,
+    numeric constants and ranges get compared all at once
+    """
+    narrowest = other.get_most_narrow()
+    if isinstance(narrowest, F.ANY):
+        return [True] * len(params)
+    try:
+        mergeable = Intervals.of(params).is_mergeable_with(Intervals.of([narrowest]))
+    except TypeError:
+        return [p.is_more_specific_than(other) for p in params]
+    return mergeable.tolist()
+
+
 class ComponentQuery:
     class Error(Exception): ...
 
+    # components parsed and checked at once, see filter_by_module_params
+    PARAMS_CHUNK = 64
+
     class ParamError(Error):
         def __init__(self, param: Parameter, msg: str):
             self.param = param
@@ -475,29 +497,49 @@ class ComponentQuery:
         :return: The first component that matches the parameters
         """
 
-        for c in self.get():
-            params = c.get_params(mapping)
+        components = self.get()
+        module_params = [getattr(module.PARAMs, m.param_name) for m in mapping]
+
+        def get_narrowest():
+            return [p.get_most_narrow() for p in module_params]
+
+        # components get parsed lazily, a chunk at a time
+        for start in range(0, len(components), self.PARAMS_CHUNK):
+            chunk = components[start : start + self.PARAMS_CHUNK]
+            params_per_c = [c.get_params(mapping) for c in chunk]
+
+            narrowest = None
+            for j, (c, params) in enumerate(zip(chunk, params_per_c)):
+                # attaching a previous component (even if it failed) might have
+                # narrowed the module params, recheck the rest of the chunk then
+                if narrowest is None or any(
+                    map(operator.is_not, narrowest, get_narrowest())
+                ):
+                    narrowest = get_narrowest()
+                    # one check of all components per module parameter
+                    matches = [
+                        _is_more_specific_than_all(
+                            [params[i] for params in params_per_c[j:]], param
+                        )
+                        for i, param in enumerate(module_params)
+                    ]
+                    offset = j
+
+                if not all(pm := [match[j - offset] for match in matches]):
+                    logger.debug(
+                        f"Component {c.lcsc} doesn't match: "
+                        f"{[p for p, v in zip(params, pm) if not v]}"
+                    )
+                    continue
 
-            if not all(
-                pm := [
-                    p.is_more_specific_than(getattr(module.PARAMs, m.param_name))
-                    for p, m in zip(params, mapping)
-                ]
-            ):
                 logger.debug(
-                    f"Component {c.lcsc} doesn't match: "
-                    f"{[p for p, v in zip(params, pm) if not v]}"
+                    f"Found part {c.lcsc:8} "
+                    f"Basic: {bool(c.basic)}, Preferred: {bool(c.preferred)}, "
+                    f"Price: ${c.get_price(1):2.4f}, "
+                    f"{c.description:15},"
                 )
-                continue
-
-            logger.debug(
-                f"Found part {c.lcsc:8} "
-                f"Basic: {bool(c.basic)}, Preferred: {bool(c.preferred)}, "
-                f"Price: ${c.get_price(1):2.4f}, "
-                f"{c.description:15},"
-            )
 
-            yield c
+                yield c
 
     def filter_by_module_params_and_attach(
         self, module: Module, mapping: list[MappingParameterDB], qty: int = 1
@@ -33,7 +33,7 @@ def str_to_enum[T: Enum](enum: type[T], x: str) -> F.Constant[T]:
     name = x.replace(" ", "_").replace("-", "_").upper()
     if name not in [e.name for e in enum]:
         raise ValueError(f"Enum translation error: {x}[={name}] not in {enum}")
-    return F.Constant(enum[name])
+    return F.Constant.intern(enum[name])
 
 
 def str_to_enum_func[T: Enum](enum: type[T]) -> Callable[[str], F.Constant[T]]:
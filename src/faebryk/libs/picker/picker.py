@@ -18,6 +18,7 @@ from faebryk.library.can_attach_to_footprint_via_pinmap import (
 )
 from faebryk.library.Electrical import Electrical
 from faebryk.library.has_picker import has_picker
+from faebryk.libs.app.parameters import resolve_parameters
 from faebryk.libs.util import NotNone, flatten
 from rich.progress import Progress
 
@@ -215,6 +216,9 @@ class PickerProgress:
 
 # TODO should be a Picker
 def pick_part_recursively(module: Module):
+    # execute all operations upfront instead of once per picker
+    resolve_parameters(module)
+
     pp = PickerProgress.from_module(module)
     try:
         with pp.context():
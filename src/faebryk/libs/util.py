@@ -4,10 +4,10 @@
 import inspect
 import logging
 from abc import abstractmethod
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from enum import StrEnum
-from functools import cache
+from functools import cache, wraps
 from textwrap import indent
 from typing import (
     Any,
@@ -148,10 +148,16 @@ class NotifiesOnPropertyChange(object):
     def __init__(self, callback) -> None:
         self._callback = callback
 
-        # TODO dir -> vars?
-        for name in dir(self):
+        for name in self._get_initial_names():
             self._callback(name, getattr(self, name))
 
+    def _get_initial_names(self) -> Iterable[str]:
+        """
+        Names of the attributes already present before init
+        """
+        # TODO dir -> vars?
+        return dir(self)
+
     def __setattr__(self, __name, __value) -> None:
         super().__setattr__(__name, __value)
 
@@ -186,7 +192,39 @@ class _wrapper(NotifiesOnPropertyChange, Generic[T, P]):
         raise NotImplementedError
 
 
+def class_factory[F: Callable[..., type]](func: F) -> F:
+    """
+    Memoized factory of classes, the first argument has to be a class.
+    The made classes are kept in the __dict__ of that class (unlike functools.cache
+    which would keep every class it has seen alive), so they live as long as it.
+    Every class made by func remembers the call in _factory_call, so it can be
+    referenced instead of copied (e.g by core.snapshot).
+    """
+
+    @wraps(func)
+    def wrapper(owner: type, *args):
+        made = owner.__dict__.get("_factory_made")
+        if made is None:
+            made = {}
+            owner._factory_made = made
+        key = (wrapper, args)
+        cls = made.get(key)
+        if cls is None:
+            cls = made[key] = func(owner, *args)
+            if "_factory_call" not in cls.__dict__:
+                cls._factory_call = (wrapper, (owner, *args))
+        return cls
+
+    return wrapper  # type: ignore
+
+
 def Holder(_type: Type[T], _ptype: Type[P]) -> Type[_wrapper[T, P]]:
+    # memoized, holder classes are only parametrized by the types
+    return _holder(_ptype, _type)
+
+
+@class_factory
+def _holder(_ptype: Type[P], _type: Type[T]) -> Type[_wrapper[T, P]]:
     _T = TypeVar("_T")
     _P = TypeVar("_P")
 
@@ -198,6 +236,31 @@ def Holder(_type: Type[T], _ptype: Type[P]) -> Type[_wrapper[T, P]]:
 
             NotifiesOnPropertyChange.__init__(self, self._callback)
 
+        @classmethod
+        def _get_fields(cls) -> list[str]:
+            """
+            Sorted names of the class attributes that can hold children.
+            Computed once per class.
+            """
+            fields = cls.__dict__.get("_fields")
+            if fields is None:
+                fields = [
+                    name
+                    for name in dir(cls)
+                    if not name.startswith("_") and not callable(getattr(cls, name))
+                ]
+                cls._fields = fields
+            return fields
+
+        def _get_initial_names(self) -> Iterable[str]:
+            fields = self._get_fields()
+            instance_fields = [
+                name for name in self.__dict__ if not name.startswith("_")
+            ]
+            if not instance_fields:
+                return fields
+            return sorted(set(fields) | set(instance_fields))
+
         def _callback(self, name: str, value: Any):
             if name.startswith("_"):
                 return
@@ -241,6 +304,11 @@ def Holder(_type: Type[T], _ptype: Type[P]) -> Type[_wrapper[T, P]]:
                 self.handle_add(f"{list_name}[{idx}]", obj)
 
         def get_all(self) -> list[T]:
+            if HOLDER_CHECKS:
+                self._check_list()
+            return self._list
+
+        def _check_list(self):
             # check for illegal list modifications
             for name in sorted(dir(self)):
                 value = getattr(self, name)
@@ -256,8 +324,6 @@ def Holder(_type: Type[T], _ptype: Type[P]) -> Type[_wrapper[T, P]]:
                     assert set(flatten(value, -1)).issubset(set(self._list))
                     continue
 
-            return self._list
-
         def handle_add(self, name: str, obj: T) -> None: ...
 
         def get_parent(self) -> P:
@@ -589,16 +655,89 @@ class SharedReference[T]:
         return f"{type(self).__name__}({self.object})"
 
 
+class UnionFindReference[T]:
+    """
+    Like SharedReference, but linked references form a disjoint-set forest
+    instead of sharing a set that gets rewritten on every link.
+    Only the representative (root) holds the object, all other references
+    resolve it lazily (with path compression).
+    Linking is union by size, thus amortized (almost) constant.
+    """
+
+    @dataclass
+    class Resolution[U, S]:
+        representative: S
+        object: U
+        old: U
+
+    def __init__(self, object: T):
+        self.object: T | None = object
+        self._parent: Self = self
+        self._size = 1
+
+    @property
+    def representative(self) -> Self:
+        root = self._parent
+        if root._parent is root:
+            return root
+
+        while root._parent is not root:
+            root = root._parent
+
+        # path compression
+        node = self
+        while node._parent is not root:
+            node._parent, node = root, node._parent
+
+        return root
+
+    def link(self, other: Self):
+        assert type(self) is type(other), f"{type(self)=} {type(other)=}"
+        lhs, rhs = self.representative, other.representative
+        if lhs is rhs:
+            return
+
+        # lhs object wins, but the bigger tree becomes the root
+        obj, old = lhs.object, rhs.object
+        if lhs._size < rhs._size:
+            lhs, rhs = rhs, lhs
+
+        rhs._parent = lhs
+        rhs.object = None
+        lhs._size += rhs._size
+        lhs.object = obj
+
+        return self.Resolution(lhs, obj, old)
+
+    def set(self, obj: T):
+        self.representative.object = obj
+
+    def __call__(self) -> T:
+        root = self._parent
+        if root._parent is not root:
+            root = self.representative
+        return root.object  # type: ignore
+
+    def __eq__(self, other: "UnionFindReference[T]"):
+        return self.representative is other.representative
+
+    def __hash__(self) -> int:
+        return hash(id(self))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self()})"
+
+
 def bfs_visit[T](neighbours: Callable[[T], list[T]], nodes: Iterable[T]) -> set[T]:
     """
     Generic BFS (not depending on Graph)
     Returns all visited nodes.
     """
-    queue: list[T] = list(nodes)
+    queue: deque[T] = deque(nodes)
     visited: set[T] = set(queue)
 
     while queue:
-        m = queue.pop(0)
+        m = queue.popleft()
 
         for neighbour in neighbours(m):
             if neighbour not in visited:
@@ -656,49 +795,6 @@ def at_exit(func: Callable):
     return f
 
 
-def lazy_construct(cls):
-    """
-    Careful: break deepcopy
-    """
-    old_init = cls.__init__
-
-    def new_init(self, *args, **kwargs):
-        self._init = False
-        self._old_init = lambda: old_init(self, *args, **kwargs)
-
-    def __getattr__(self, name: str, /):
-        assert "_init" in self.__dict__
-        if self._init:
-            raise AttributeError(name)
-        self._old_init()
-        self._init = True
-        return self.__getattribute__(name)
-
-    cls.__init__ = new_init
-    cls.__getattr__ = __getattr__
-    return cls
-
-
-# TODO figure out nicer way (with metaclass or decorator)
-class LazyMixin:
-    @property
-    def is_init(self):
-        return self.__dict__.get("_init", False)
-
-    def force_init(self):
-        if self.is_init:
-            return
-        self._old_init()
-        self._init = True
-
-
-class Lazy(LazyMixin):
-    def __init_subclass__(cls) -> None:
-        print("SUBCLASS", cls)
-        super().__init_subclass__()
-        lazy_construct(cls)
-
-
 class ConfigFlag:
     def __init__(self, name: str, default: bool = False, descr: str = "") -> None:
         self.name = name
@@ -728,6 +824,13 @@ class ConfigFlag:
         return res
 
 
+HOLDER_CHECKS = ConfigFlag(
+    "HOLDER_CHECKS",
+    False,
+    "Check Holders for illegal list modifications on get_all. Slow, debug only",
+)
+
+
 class ConfigFlagEnum[E: StrEnum]:
     def __init__(self, enum: type[E], name: str, default: E, descr: str = "") -> None:
         self.enum = enum
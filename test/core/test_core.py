@@ -3,9 +3,10 @@
 
 import unittest
 from abc import abstractmethod
+from importlib.util import find_spec
 from typing import cast
 
-from faebryk.core.core import LinkDirect, LinkParent, LinkSibling, TraitImpl
+from faebryk.core.core import Link, LinkDirect, LinkParent, LinkSibling, TraitImpl
 
 
 class TestTraits(unittest.TestCase):
@@ -156,6 +157,57 @@ class TestTraits(unittest.TestCase):
         obj.del_trait(trait1)
         self.assertFalse(obj.has_trait(trait1))
 
+    def test_dynamic_traits(self):
+        from faebryk.core.core import FaebrykLibObject, Trait
+
+        class trait1(Trait): ...
+
+        class trait1_1(trait1): ...
+
+        class dyn_impl(trait1_1.impl()):
+            enabled = False
+
+            def is_implemented(self):
+                return self.enabled
+
+        obj = FaebrykLibObject()
+        impl = obj.add_trait(dyn_impl())
+        self.assertEqual(obj.traits, [impl])
+
+        for trait in [trait1, trait1_1]:
+            self.assertFalse(obj.has_trait(trait))
+        impl.enabled = True
+        for trait in [trait1, trait1_1]:
+            self.assertTrue(obj.has_trait(trait))
+            self.assertIs(obj.get_trait(trait), impl)
+
+    def test_trait_classes_collected(self):
+        import gc
+        from weakref import ref
+
+        from faebryk.core.core import FaebrykLibObject, Trait
+
+        class trait1(Trait): ...
+
+        obj = FaebrykLibObject()
+        obj.add_trait(trait1.impl()())
+
+        def add_local_trait():
+            class local_trait(Trait): ...
+
+            # not via impl(), typing caches the subscripted class it makes
+            class local_impl(TraitImpl, local_trait): ...
+
+            obj.add_trait(local_impl())
+            self.assertTrue(obj.has_trait(local_trait))
+            obj.del_trait(local_trait)
+            return ref(local_trait), ref(local_impl)
+
+        refs = add_local_trait()
+        self.assertTrue(obj.has_trait(trait1))
+        gc.collect()
+        self.assertEqual([r() for r in refs], [None, None])
+
 
 class TestGraph(unittest.TestCase):
     def test_gifs(self):
@@ -205,6 +257,232 @@ class TestGraph(unittest.TestCase):
 
         self.assertEqual(n1.GIFs.self.G, n2.GIFs.self.G)
 
+    def test_compact_objects(self):
+        from faebryk.core.core import Node
+
+        n1, n2 = Node(), Node()
+        n1.NODEs.n2 = n2
+        link = n1.GIFs.children.is_connected(n2.GIFs.parent)
+
+        # no __dict__ and no trait dict unless traits get added
+        for obj in [link, n1.GIFs.self, n1.GIFs.children]:
+            self.assertFalse(hasattr(obj, "__dict__"))
+            self.assertEqual(obj.traits, [])
+        self.assertIs(link._traits, n1.GIFs.self._traits)
+        self.assertIsInstance(link.get_connections(), tuple)
+
+    def test_hierarchy_cache(self):
+        from faebryk.core.core import Node
+
+        n1, n2, n3 = Node(), Node(), Node()
+        n2.NODEs.n3 = n3
+
+        self.assertEqual(n3.get_full_name(), "*.n3")
+        self.assertEqual(n3.get_full_name(types=True), "*|Node.n3|Node")
+
+        # parenting the root invalidates cached descendants
+        n1.NODEs.n2 = n2
+        self.assertEqual(n3.get_hierarchy(), [(n1, "*"), (n2, "n2"), (n3, "n3")])
+        self.assertEqual(n3.get_full_name(), "*.n2.n3")
+        self.assertIs(n3.get_full_name(), n3.get_full_name())
+        self.assertEqual(n3.get_parent(), n3.GIFs.parent.get_parent())
+
+        self.assertRaises(AssertionError, lambda: setattr(n1.NODEs, "n3", n3))
+
+    def test_factory_classes_collected(self):
+        import gc
+        from weakref import ref
+
+        from faebryk.core.core import ModuleInterface
+
+        def connect_local_mifs():
+            class local_mif(ModuleInterface): ...
+
+            # makes GIFS (with its holder) and link classes for local_mif
+            mif1, mif2 = local_mif(), local_mif()
+            mif1.connect_shallow(mif2)
+            link = mif1.is_connected_to(mif2)
+            self.assertIsInstance(link, local_mif.LinkDirectShallow())
+            self.assertIs(type(mif1.GIFs), local_mif.GIFS())
+            return ref(local_mif), ref(type(mif1.GIFs)), ref(type(link))
+
+        refs = connect_local_mifs()
+        gc.collect()
+        self.assertEqual([r() for r in refs], [None] * len(refs))
+
+    def test_edges_by_type(self):
+        from faebryk.core.core import GraphInterfaceSelf as GIF
+        from faebryk.core.core import LinkNamedParent, Node
+        from faebryk.core.graph import Graph
+
+        class linkcls(LinkDirect):
+            pass
+
+        n = Node()
+        for i in range(5):
+            setattr(n.NODEs, f"n{i}", Node())
+
+        gif1, gif2, gif3 = GIF(), GIF(), GIF()
+        gif1.connect(n.GIFs.self)
+        gif1.connect(gif2, linkcls)
+        gif1.connect(gif3, linkcls)
+
+        G = n.get_graph()
+        for obj in [n.GIFs.children, n.GIFs.self, gif1, gif3]:
+            for link_type in [Link, LinkDirect, linkcls, LinkSibling, LinkParent]:
+                self.assertEqual(
+                    dict(G.get_edges_by_type(obj, link_type)),
+                    Graph.get_edges_by_type(G, obj, link_type),
+                )
+
+        self.assertEqual(len(n.GIFs.children.get_links_by_type(LinkNamedParent)), 5)
+        self.assertEqual(len(gif1.get_links_by_type(linkcls)), 2)
+        self.assertEqual(len(gif1.get_links_by_type(LinkDirect)), 3)
+        self.assertEqual(gif3.get_links_by_type(LinkSibling), [])
+
+        # PyGraph answers from its only adjacency map, without copying it for
+        # vertices with a single link class
+        from faebryk.core.graph_backends.graphpy import GraphPY
+
+        if isinstance(G, GraphPY):
+            self.assertIs(G().edges_by_type(gif2, LinkDirect), G().edges(gif2))
+
+    @staticmethod
+    def _bfs_visit_cases():
+        """
+        Builder of a test graph and the bfs_visit arguments to check on it
+        """
+
+        class A:
+            def __init__(self, i: int):
+                self.i = i
+
+        class B(A): ...
+
+        objs = [(B if i % 3 == 0 else A)(i) for i in range(30)]
+        edges = [(objs[i], objs[(i * 7 + 1) % 30]) for i in range(30)] + [
+            (objs[i], objs[i + 1]) for i in range(0, 29, 2)
+        ]
+
+        def build(GT: type):
+            G = GT()
+            for i, (a, b) in enumerate(edges):
+                G.add_edge(a, b, link=i)
+            G.add_edge(objs[0], objs[0 + 1], link=-1)
+            return G
+
+        cases = [
+            dict(filter=None),
+            dict(filter=lambda o: o.i % 5 != 4),
+            dict(filter=None, types=B),
+            dict(filter=lambda o: o.i % 2 == 0, types=A, exclude=objs[1:4]),
+            dict(filter=None, start=[objs[3], objs[4]], exclude=[objs[4]]),
+        ]
+        for kwargs in cases:
+            kwargs.setdefault("start", [objs[0]])
+        return build, cases
+
+    def test_bfs_visit(self):
+        from faebryk.core.graph import Graph
+        from faebryk.core.graph_backends.graphcsr import GraphCSR
+        from faebryk.core.graph_backends.graphpy import GraphPY
+
+        build, cases = self._bfs_visit_cases()
+        for GT in [GraphPY, GraphCSR]:
+            G = build(GT)
+            for kwargs in cases:
+                self.assertEqual(G.bfs_visit(**kwargs), Graph.bfs_visit(G, **kwargs))
+
+    @unittest.skipUnless(find_spec("graph_tool"), "graph_tool not installed")
+    def test_bfs_visit_gt(self):
+        from faebryk.core.graph_backends.graphgt import GraphGT
+        from faebryk.core.graph_backends.graphpy import GraphPY
+
+        build, cases = self._bfs_visit_cases()
+        G, G_py = build(GraphGT), build(GraphPY)
+        for kwargs in cases:
+            self.assertEqual(G.bfs_visit(**kwargs), G_py.bfs_visit(**kwargs))
+
+    def test_implicit_siblings(self):
+        from unittest.mock import patch
+
+        import faebryk.core.core as core
+        from faebryk.core.core import GraphImpl
+        from faebryk.core.util import get_children, get_node_children_all
+        from faebryk.library.Resistor import Resistor
+
+        def build(implicit_edges):
+            with patch.object(GraphImpl, "implicit_edges", implicit_edges):
+                with patch.object(
+                    GraphImpl, "merge", autospec=True, side_effect=GraphImpl.merge
+                ) as merge:
+                    rs = [Resistor() for _ in range(2)]
+                # only the parent links of the children
+                merges = merge.call_count - 2 * len(get_children(rs[0], False))
+                rs[0].IFs.unnamed[1].connect(rs[1].IFs.unnamed[0])
+
+                G = rs[0].get_graph()
+                edges = {
+                    (
+                        gif.get_full_name(),
+                        o.get_full_name(),
+                        type(link),
+                        frozenset(i.get_full_name() for i in link.get_connections()),
+                    )
+                    for gif in G
+                    for o, link in gif.edges.items()
+                }
+                siblings = {
+                    (gif.get_full_name(), len(gif.get_links_by_type(LinkSibling)))
+                    for gif in G
+                }
+                r = rs[0].IFs.unnamed[1]
+                connected = r.GIFs.connected.is_connected(r.GIFs.self)
+                reachable = {n.get_full_name() for n in get_node_children_all(rs[0])}
+                return (
+                    merges,
+                    G.node_cnt,
+                    G.edge_cnt,
+                    (edges, siblings, type(connected), reachable),
+                )
+
+        _, s_nodes, s_edges, stored = build(None)
+        i_merges, i_nodes, i_edges, implicit = build(core._SIBLING_EDGES)
+
+        self.assertEqual(implicit, stored)
+        self.assertEqual(i_nodes, s_nodes)
+        self.assertEqual(i_merges, 0)
+        self.assertLess(2 * i_edges, s_edges)
+
+    def test_csr_backend(self):
+        from faebryk.core.graph_backends.graphcsr import CSRGraph
+        from faebryk.core.graph_backends.graphpy import PyGraph
+
+        def make_edges(offset: int):
+            return [
+                (i + offset, (i * 7 + 3) % 10 + offset, f"l{i + offset}")
+                for i in range(10)
+            ] + [(1 + offset, 2 + offset, "dup1"), (2 + offset, 1 + offset, "dup2")]
+
+        def build(G, es):
+            g = G()
+            for e in es:
+                g.add_edge(*e)
+            return g
+
+        py = build(PyGraph, make_edges(0) + make_edges(10))
+        csr = build(CSRGraph, make_edges(0))
+        csr.update(build(CSRGraph, make_edges(10)))
+        for g in (py, csr):
+            g.add_edge(0, 10, "bridge")
+
+        self.assertEqual(set(csr), set(py))
+        self.assertEqual(csr.size(), py.size())
+        for v in py:
+            self.assertEqual(list(csr.edges(v).items()), list(py.edges(v).items()))
+            for w in py:
+                self.assertEqual(csr.edge(v, w), py.edges(v).get(w))
+
 
 if __name__ == "__main__":
     unittest.main()
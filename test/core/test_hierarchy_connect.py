@@ -2,9 +2,12 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import time
 import unittest
 from itertools import chain
+from unittest.mock import patch
 
+import faebryk.core.core as core
 from faebryk.core.core import (
     LinkDirect,
     LinkDirectShallow,
@@ -16,6 +19,7 @@ from faebryk.core.core import logger as core_logger
 from faebryk.core.util import specialize_interface
 from faebryk.library.Electrical import Electrical
 from faebryk.library.ElectricLogic import ElectricLogic
+from faebryk.library.ElectricPower import ElectricPower
 from faebryk.library.has_single_electric_reference_defined import (
     has_single_electric_reference_defined,
 )
@@ -209,6 +213,55 @@ class TestHierarchy(unittest.TestCase):
 
         self.assertIsInstance(mifs_special[0].is_connected_to(mifs_special[2]), _Link)
 
+    def test_transitive_up_connect(self):
+        mifs = times(3, ElectricLogic)
+
+        mifs[0].IFs.signal.connect(mifs[1].IFs.signal)
+        mifs[0].IFs.reference.connect(mifs[2].IFs.reference)
+        self.assertFalse(mifs[0].is_connected_to(mifs[1]))
+
+        # joins the references of 0 and 1 through 2
+        mifs[2].IFs.reference.connect(mifs[1].IFs.reference)
+        self.assertTrue(mifs[0].is_connected_to(mifs[1]))
+        self.assertFalse(mifs[0].is_connected_to(mifs[2]))
+
+
+class TestHierarchyNetIndex(TestHierarchy):
+    def setUp(self) -> None:
+        patcher = patch.object(core, "NET_INDEX", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_clique(self):
+        mifs = times(10, ModuleInterface)
+        for m in mifs[1:]:
+            mifs[0].connect(m)
+
+        self.assertTrue(mifs[1].is_connected_to(mifs[9]))
+        self.assertEqual(mifs[1].get_direct_connections(), set(mifs) - {mifs[1]})
+        self.assertEqual(
+            mifs[1].GIFs.connected.get_direct_connections(),
+            {mifs[0].GIFs.connected, mifs[1].GIFs.self},
+        )
+
+    def test_star_scaling(self):
+        # e.g every lv of a design joined to one GND
+        def star(n: int) -> float:
+            gnd = Electrical()
+            powers = times(n, ElectricPower)
+            start = time.perf_counter()
+            for power in powers:
+                power.IFs.lv.connect(gnd)
+            self.assertTrue(powers[0].IFs.lv.is_connected_to(powers[-1].IFs.lv))
+            self.assertFalse(powers[0].is_connected_to(powers[-1]))
+            return time.perf_counter() - start
+
+        n = 100
+        small = min(star(n) for _ in range(3))
+        big = min(star(4 * n) for _ in range(3))
+        # linear is 4x, quadratic 16x
+        self.assertLess(big / small, 8)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,54 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from faebryk.core.instrumentation import Recorder, instrument
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_recorder(self):
+        rec = Recorder(max_events=16)
+
+        def fib(n: int) -> int:
+            return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+        fib = instrument(fib, "fib", rec)
+        square = instrument(lambda x: x * x, "square", rec)
+
+        self.assertEqual(fib(5), 5)
+        for i in range(3):
+            square(i)
+
+        self.assertEqual(rec.stats["fib"].calls, 15)
+        self.assertEqual(rec.stats["square"].calls, 3)
+        # recursive calls only count once to the total
+        outermost = max(d for name, _, d, _ in rec.events if name == "fib")
+        self.assertEqual(rec.stats["fib"].total, outermost)
+        self.assertEqual(len(rec.events), 16)
+
+        report = rec.report()
+        self.assertEqual(report.splitlines()[1].split()[:2], ["fib", "15"])
+        self.assertEqual(len(rec.report(limit=1).splitlines()), 2)
+
+        with TemporaryDirectory() as tmp:
+            rec.export_json(Path(tmp) / "stats.json")
+            stats = json.loads((Path(tmp) / "stats.json").read_text())
+            rec.export_chrome_trace(Path(tmp) / "trace.json")
+            trace = json.loads((Path(tmp) / "trace.json").read_text())
+
+        self.assertEqual(stats["square"]["calls"], 3)
+        self.assertEqual({e["ph"] for e in trace["traceEvents"]}, {"X"})
+        self.assertEqual(len(trace["traceEvents"]), 16)
+
+        rec.reset()
+        self.assertEqual(rec.report(), "No calls recorded")
+        square(2)
+        self.assertEqual(rec.stats["square"].calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
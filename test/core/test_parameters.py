@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MIT
 
 import logging
+import math
 import unittest
 from operator import add
 from typing import TypeVar
@@ -180,6 +181,178 @@ class TestParameters(unittest.TestCase):
             Constant(Constant(Constant(1))),
         )
 
+    def test_narrowing_cache(self):
+        a, b, c = TBD(), TBD(), TBD()
+        a.merge(b)
+        b_narrow = b.merge(Range(1, 10))
+        self.assertIs(b.get_most_narrow(), b_narrow)
+
+        # path compression: every parameter of the chain points to its end
+        for p in [a, b]:
+            self.assertIs(p._narrowest[0], b_narrow)
+
+        # narrowing the end invalidates the cached ones
+        out = c.merge(b)
+        self.assertIs(out, b_narrow)
+        narrow = a.merge(Range(2, 3))
+        self.assertEqual(narrow, Range(2, 3))
+        for p in [a, b, c, b_narrow]:
+            self.assertIs(p.get_most_narrow(), narrow)
+
+        # operations get executed as soon as their operands got narrowed
+        x = TBD()
+        op = x + Constant(1)
+        self.assertIs(op.get_most_narrow(), op)
+        x.merge(Constant(1))
+        self.assertEqual(op.get_most_narrow(), Constant(2))
+        self.assertIs(op.get_most_narrow(), op.get_most_narrow())
+
+        # narrowing an unrelated parameter keeps the cache of this chain
+        cached = a._narrowest
+        TBD().merge(Range(0, 1))
+        self.assertIs(a.get_most_narrow(), narrow)
+        self.assertIs(a._narrowest, cached)
+
+        # a parameter narrowed by a nested operation follows its execution
+        y, z = TBD(), TBD()
+        nested = (y + Constant(1)) * Constant(2)
+        z.merge(nested)
+        self.assertIs(z.get_most_narrow(), nested)
+        y.merge(Constant(1))
+        self.assertEqual(z.get_most_narrow(), Constant(4))
+
+    def test_operation_memo(self):
+        calls = []
+
+        def counting_add(a, b):
+            calls.append((a, b))
+            return a + b
+
+        x, y = TBD(), TBD()
+        op = Operation([x, Constant(1)], counting_add)
+        for _ in range(3):
+            self.assertIs(op.get_most_narrow(), op)
+        self.assertEqual(len(calls), 1)
+
+        # narrowing something else does not re-execute
+        y.merge(Constant(5))
+        self.assertIs(op.get_most_narrow(), op)
+        self.assertEqual(len(calls), 1)
+
+        x.merge(Range(1, 2))
+        self.assertEqual(op.get_most_narrow(), Range(2, 3))
+        self.assertEqual(op.get_most_narrow(), Range(2, 3))
+        self.assertEqual(len(calls), 2)
+
+    def test_literal_promotion(self):
+        def promoted(p: Parameter):
+            return "GIFs" in vars(p)
+
+        one = Constant(1)
+        r = Range(0, 10)
+        out = r * one + Constant(2)
+        self.assertEqual(out, Range(2, 12))
+        self.assertIs(out.get_most_narrow(), out)
+        self.assertFalse(r.is_more_specific_than(TBD()))
+        for p in [one, r, out, *r.bounds]:
+            self.assertFalse(promoted(p))
+
+        # probing does not promote
+        for name in ["GIFs", "NODEs", "PARAMs"]:
+            self.assertFalse(hasattr(one, name))
+        self.assertIsNone(getattr(r, "GIFs", None))
+        self.assertEqual(r.get_narrowing_chain(), [r])
+        self.assertFalse(promoted(one) or promoted(r))
+        two = Constant(2)
+        self.assertIs(two._as_node(), two)
+        self.assertTrue(promoted(two))
+
+        # narrowing promotes
+        narrow = r.merge(Range(5, 20))
+        for p in [r, narrow]:
+            self.assertTrue(promoted(p))
+        self.assertEqual(r.get_most_narrow(), Range(5, 10))
+        self.assertFalse(promoted(one))
+
+        # attaching promotes
+        m = Module()
+        m.PARAMs.p = one
+        self.assertTrue(promoted(one))
+        self.assertEqual(one.get_parent(), (m, "p"))
+        self.assertEqual(one.get_graph(), m.get_graph())
+
+    def test_interning(self):
+        five = Constant.intern(5)
+        self.assertIs(Constant.intern(5), five)
+        self.assertIsNot(Constant.intern(5.0), five)
+        self.assertIsNot(Constant(5), five)
+        self.assertEqual(Constant(5), five)
+        self.assertIs(Range(0, 5).bounds[1], five)
+        self.assertIsInstance(Constant.intern([5]), Constant)
+
+        # signed zeros stay apart, also as range bounds
+        zero = Constant.intern(0.0)
+        self.assertIsNot(Constant.intern(-0.0), zero)
+        self.assertEqual(math.copysign(1, Range(-0.0, 1.0).bounds[0].value), -1)
+        self.assertIs(Range(0.0, 1.0).bounds[0], zero)
+        # NaN would never be found again
+        nan = float("nan")
+        self.assertIsNot(Constant.intern(nan), Constant.intern(nan))
+        self.assertNotIn(nan, [key[2] for key in Constant._interned_by_value.keys()])
+
+        # narrowing with interned constants never touches them
+        p1, p2 = TBD(), TBD()
+        out1, out2 = p1.merge(five), p2.merge(5)
+        self.assertEqual(out1, five)
+        self.assertIsNot(out1, five)
+        self.assertIsNot(p1.get_graph(), p2.get_graph())
+        self.assertIs(p2.get_most_narrow(), out2)
+        self.assertIs(five.get_most_narrow(), five)
+        self.assertEqual(p1.override(5), five)
+        self.assertNotIn("GIFs", vars(five))
+        with self.assertRaises(ValueError):
+            five._narrowed(TBD())
+
+        m = Module()
+        with self.assertRaises(AssertionError):
+            m.PARAMs.p = Constant.intern(6)
+        m.PARAMs.p = Constant.intern(6).copy()
+
+    def test_resolve_parameters(self):
+        from faebryk.libs.app.parameters import resolve_parameters
+
+        m = Module()
+        m.NODEs.rs = [Resistor() for _ in range(4)]
+        rs = [r.PARAMs.resistance for r in m.NODEs.rs]
+        # chain in reverse so lazy resolution would execute bottom up
+        for r, r_next in zip(rs, rs[1:]):
+            r.merge(r_next * 2)
+
+        resolved = resolve_parameters(m)
+        self.assertIsInstance(resolved[rs[0]], Operation)
+        self.assertIs(resolve_parameters(m), resolved)
+
+        rs[-1].merge(Constant(1))
+        resolved = resolve_parameters(m)
+        self.assertEqual(
+            [resolved[r] for r in rs], [Constant(2**i) for i in (3, 2, 1, 0)]
+        )
+        self.assertIs(resolved[rs[0]], rs[0].get_most_narrow())
+        self.assertIsInstance(resolved[m.NODEs.rs[0].PARAMs.rated_power], TBD)
+
+        # operations outside of the module are left to lazy resolution
+        top = Module()
+        top.NODEs.m = m
+        top.NODEs.other = Resistor()
+        other = top.NODEs.other.PARAMs.resistance
+        x = TBD()
+        op = other.merge(x * 2)
+        x.merge(Constant(1))
+        resolved = resolve_parameters(m)
+        self.assertFalse(any(p is other for p in resolved))
+        self.assertIs(other._get_most_narrow(), op)
+        self.assertEqual(other.get_most_narrow(), Constant(2))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,14 +1,31 @@
 # This file is part of the faebryk project
 # SPDX-License-Identifier: MIT
 
+import importlib.util
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
 import time
+import tracemalloc
 import unittest
-from itertools import pairwise
+from itertools import combinations, pairwise
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from textwrap import indent
-from typing import Callable
+from typing import Any, Callable
+from unittest.mock import patch
 
+import faebryk.core.core as core
 import faebryk.core.util as core_util
-from faebryk.core.core import GraphInterface, Module, ModuleInterface
+from faebryk.core.core import FaebrykLibObject, GraphInterface, Module, ModuleInterface
+from faebryk.core.graph_backends.default import BACKEND, Backends
+from faebryk.core.snapshot import dumps, loads
+from faebryk.library.Electrical import Electrical
+from faebryk.library.I2C import I2C
 from faebryk.library.Resistor import Resistor
 from faebryk.libs.util import times
 
@@ -40,7 +57,246 @@ class Times:
         )
 
 
+# Benchmark suite --------------------------------------------------------------
+# Every case prepares its inputs for the given size and returns the measured call.
+# The backend is fixed at import, so each backend runs in its own process
+# (see TestPerformance.test_benchmark_backends).
+
+BENCHMARK_SIZES = [
+    int(s) for s in os.environ.get("FBRK_BENCHMARK_SIZES", "32,128").split(",")
+]
+# outside of the source tree unless given
+BENCHMARK_DIR = Path(
+    os.environ.get(
+        "FBRK_BENCHMARK_DIR", Path(tempfile.gettempdir()) / "faebryk_benchmarks"
+    )
+)
+# previous results to compare against, e.g a copy of core.json
+BENCHMARK_BASELINE = Path(
+    os.environ.get("FBRK_BENCHMARK_BASELINE", BENCHMARK_DIR / "baseline.json")
+)
+# slowdown vs baseline that counts as regression
+BENCHMARK_TOLERANCE = float(os.environ.get("FBRK_BENCHMARK_TOLERANCE", "2.0"))
+
+
+def _bench_instantiate(size: int):
+    return lambda: times(size, Resistor)
+
+
+def _bench_connect_chain(size: int):
+    mifs = times(size, Electrical)
+    return lambda: [a.connect(b) for a, b in pairwise(mifs)]
+
+
+def _bench_connect_star(size: int):
+    center, *mifs = times(size, Electrical)
+    return lambda: [center.connect(m) for m in mifs]
+
+
+def _bench_connect_clique(size: int):
+    # quadratic amount of connections
+    mifs = times(max(2, size // 8), Electrical)
+    return lambda: [a.connect(b) for a, b in combinations(mifs, 2)]
+
+
+def _bench_connect_bus(size: int):
+    # connecting buses connects their children hierarchically
+    buses = times(max(2, size // 16), I2C)
+    return lambda: [a.connect(b) for a, b in pairwise(buses)]
+
+
+def _app(size: int) -> tuple[Module, list[Resistor]]:
+    app = Module()
+    app.NODEs.rs = times(size, Resistor)
+    for a, b in pairwise(app.NODEs.rs):
+        a.IFs.unnamed[1].connect(b.IFs.unnamed[0])
+    return app, app.NODEs.rs
+
+
+def _bench_build_app(size: int):
+    return lambda: _app(size)
+
+
+def _bench_snapshot_load(size: int):
+    # compare with build_app
+    data = dumps(_app(size)[0])
+    return lambda: loads(data)
+
+
+def _bench_get_node_children_all(size: int):
+    app, _ = _app(size)
+    return lambda: core_util.get_node_children_all(app)
+
+
+def _bench_get_all_modules(size: int):
+    app, _ = _app(size)
+    return lambda: core_util.get_all_modules(app)
+
+
+def _bench_get_all_nodes_of_type(size: int):
+    app, _ = _app(size)
+    return lambda: core_util.get_all_nodes_of_type(app.get_graph(), Resistor)
+
+
+def _bench_get_connected_mifs(size: int):
+    _, rs = _app(size)
+    return lambda: [
+        core_util.get_connected_mifs(r.IFs.unnamed[0].GIFs.connected) for r in rs
+    ]
+
+
+def _bench_get_mif_tree(size: int):
+    app, _ = _app(size)
+    return lambda: core_util.get_mif_tree(app)
+
+
+BENCHMARKS: dict[str, Callable[[int], Callable[[], Any]]] = {
+    name.removeprefix("_bench_"): f
+    for name, f in list(globals().items())
+    if name.startswith("_bench_")
+}
+
+
+def measure_memory(size: int) -> dict[str, float]:
+    """
+    Traced bytes of size chained Electricals, per GIF (whole design incl. nodes)
+    and per edge (added by connecting)
+    """
+    tracemalloc.start()
+    try:
+        mifs = times(size, Electrical)
+        instantiated = tracemalloc.get_traced_memory()[0]
+        gif_cnt = sum(m.get_graph().node_cnt for m in mifs)
+        edge_cnt = sum(m.get_graph().edge_cnt for m in mifs)
+
+        for a, b in pairwise(mifs):
+            a.connect(b)
+        connected = tracemalloc.get_traced_memory()[0]
+        edge_cnt = mifs[0].get_graph().edge_cnt - edge_cnt
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "bytes_per_gif": instantiated / gif_cnt,
+        "bytes_per_edge": (connected - instantiated) / edge_cnt,
+    }
+
+
+def run_benchmarks(sizes: list[int], repeat: int = 3) -> dict[str, Any]:
+    """
+    Best of repeat runs (in seconds) per benchmark and size
+    """
+    results = {}
+    for name, case in BENCHMARKS.items():
+        results[name] = {}
+        for size in sizes:
+            best = float("inf")
+            for _ in range(repeat):
+                run = case(size)
+                now = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - now)
+            results[name][str(size)] = best
+
+    return {
+        "backend": str(BACKEND.get()),
+        "python": platform.python_version(),
+        "results": results,
+        "memory": measure_memory(max(sizes)),
+    }
+
+
+def scaling_exponent(by_size: dict[str, float]) -> str:
+    """
+    How the duration grows from the smallest to the largest size, 1 = linear
+    """
+    sizes = sorted(by_size, key=int)
+    if int(sizes[0]) == int(sizes[-1]):
+        return ""
+    # too fast to measure would be 0
+    resolution = time.get_clock_info("perf_counter").resolution
+    first, last = (max(by_size[s], resolution) for s in (sizes[0], sizes[-1]))
+    exponent = math.log(last / first) / math.log(int(sizes[-1]) / int(sizes[0]))
+    return f"O(n^{exponent:.1f})"
+
+
+def compare_benchmarks(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> tuple[str, list[str]]:
+    """
+    Table of current/baseline ratios for all backends, benchmarks and sizes in both
+    and the ones slower than tolerance
+    """
+    lines, regressions = [], []
+    for backend, result in current.items():
+        base = baseline.get(backend, {}).get("results", {})
+        for name, by_size in result["results"].items():
+            for size, duration in by_size.items():
+                base_duration = base.get(name, {}).get(size)
+                if not base_duration:
+                    continue
+                ratio = duration / base_duration
+                line = f"{backend:>4} {name:<24} {size:>6}: {ratio:5.2f}x"
+                lines.append(line)
+                if ratio > tolerance:
+                    regressions.append(line)
+    return "\n".join(lines), regressions
+
+
 class TestPerformance(unittest.TestCase):
+    def test_benchmark_backends(self):
+        results = {}
+        with TemporaryDirectory() as tmp:
+            for backend in Backends:
+                if backend == Backends.GT and not importlib.util.find_spec(
+                    "graph_tool"
+                ):
+                    print(f"Skipping backend {backend}: graph_tool not installed")
+                    continue
+                out = Path(tmp) / f"{backend}.json"
+                subprocess.run(
+                    [sys.executable, __file__, "--benchmark", str(out)]
+                    + [str(s) for s in BENCHMARK_SIZES],
+                    env=os.environ | {"FBRK_BACKEND": str(backend)},
+                    check=True,
+                )
+                results[str(backend)] = json.loads(out.read_text())
+
+        BENCHMARK_DIR.mkdir(parents=True, exist_ok=True)
+        (BENCHMARK_DIR / "core.json").write_text(json.dumps(results, indent=4))
+
+        for backend, result in results.items():
+            print(f"{backend:-<80}")
+            for name, by_size in result["results"].items():
+                timings = " ".join(
+                    f"{size:>6}: {duration * 1e3:8.2f}ms"
+                    for size, duration in by_size.items()
+                )
+                print(f"{name:<24} {timings}  {scaling_exponent(by_size)}")
+            print(
+                ", ".join(
+                    f"{name}: {value:.0f}" for name, value in result["memory"].items()
+                )
+            )
+
+        if not BENCHMARK_BASELINE.exists():
+            self.skipTest(
+                f"No baseline at {BENCHMARK_BASELINE} to compare to,"
+                f" results are in {BENCHMARK_DIR / 'core.json'}"
+            )
+        table, regressions = compare_benchmarks(
+            results, json.loads(BENCHMARK_BASELINE.read_text()), BENCHMARK_TOLERANCE
+        )
+        print(f"Compared to {BENCHMARK_BASELINE}:\n{table}")
+        self.assertFalse(regressions, "Regressions:\n" + "\n".join(regressions))
+
+    def test_memory(self):
+        memory = measure_memory(256)
+        print(
+            f"{BACKEND.get()}: {memory['bytes_per_gif']:.0f} bytes per GIF,"
+            f" {memory['bytes_per_edge']:.0f} bytes per edge"
+        )
+
     def test_get_all(self):
         def _factory_simple_resistors(count: int):
             class App(Module):
@@ -139,6 +395,136 @@ class TestPerformance(unittest.TestCase):
             per_resistor = timings.times["instance"] / count
             print(f"----> Avg/resistor: {per_resistor*1e3:.2f} ms")
 
+    def test_holder_factories(self):
+        count = 2**9
+
+        def clear_caches():
+            # made classes are memoized in the classes they are made for
+            todo: list[type] = [FaebrykLibObject]
+            while todo:
+                t = todo.pop()
+                todo.extend(t.__subclasses__())
+                if "_factory_made" in t.__dict__:
+                    del t._factory_made
+
+        def instantiate(memoized: bool):
+            timings = Times()
+            resistors = []
+            for _ in range(count):
+                if not memoized:
+                    clear_caches()
+                resistors.append(Resistor())
+            timings.add("instance")
+            return timings.times["instance"] / count, resistors
+
+        per_resistor_fresh, _ = instantiate(memoized=False)
+        per_resistor, resistors = instantiate(memoized=True)
+
+        self.assertEqual(len({type(r.GIFs) for r in resistors}), 1)
+        self.assertEqual(len({type(r.PARAMs).__base__ for r in resistors}), 1)
+
+        print(f"----> Avg/resistor (fresh factories): {per_resistor_fresh*1e3:.2f} ms")
+        print(f"----> Avg/resistor (memoized): {per_resistor*1e3:.2f} ms")
+
+    def test_node_construction(self):
+        import tracemalloc
+
+        from faebryk.core.core import GraphImpl
+
+        count = 2**10
+
+        for lazy in [False, True]:
+            with patch.object(core, "LAZY", lazy):
+                for t in [Module, ModuleInterface, Resistor]:
+                    counter = GraphImpl.counter
+                    tracemalloc.start()
+                    now = time.time()
+                    nodes = times(count, t)
+                    duration = time.time() - now
+                    allocated, _ = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    graph_cnt = GraphImpl.counter - counter
+                    tree = core_util.get_children(
+                        nodes[0], direct_only=False, include_root=True
+                    )
+                    if lazy or GraphImpl.implicit_edges is not None:
+                        # one graph per node (created by its self GIF)
+                        self.assertEqual(graph_cnt, len(tree) * count)
+                    else:
+                        # exactly one graph per GIF, no discarded GIF sets
+                        self.assertEqual(
+                            graph_cnt, sum(len(n.GIFs.get_all()) for n in tree) * count
+                        )
+                    print(
+                        f"----> {t.__name__}{' (lazy)' if lazy else ''}: "
+                        f"{graph_cnt / count:.1f} graphs/node, "
+                        f"{allocated / count / 1024:.1f} KiB/node, "
+                        f"{duration / count * 1e3:.2f} ms/node (traced)"
+                    )
+
+    def test_clone(self):
+        from faebryk.core.snapshot import Prototype
+        from faebryk.library.RP2040 import RP2040
+
+        # RP2040_Reference_Design can't be instantiated currently (MultiSPI)
+        for t, count in [(Resistor, 2**8), (RP2040, 2**3)]:
+            timings = Times()
+
+            times(count, t)
+            timings.add("init")
+
+            prototype = Prototype(t)
+            timings.add("prototype")
+
+            clones = times(count, prototype.clone)
+            timings.add("clone")
+
+            self.assertEqual(
+                len(core_util.get_node_children_all(clones[-1])),
+                len(core_util.get_node_children_all(t())),
+            )
+
+            print(f"{t.__name__} x{count}", timings)
+            print(
+                f"----> {t.__name__}: init/clone "
+                f"{timings.times['init'] / timings.times['clone']:.1f}x"
+            )
+
+    def test_resolve_parameters(self):
+        from faebryk.library.Constant import Constant
+        from faebryk.libs.app.parameters import resolve_parameters
+
+        def make_app(count: int):
+            app = Module()
+            app.NODEs.rs = times(count, Resistor)
+            rs = [r.PARAMs.resistance for r in app.NODEs.rs]
+            # short chains, lazy resolution recurses through them
+            for i, (r, r_next) in enumerate(pairwise(rs)):
+                if i % 4 == 3:
+                    r.merge(Constant(i))
+                else:
+                    r.merge(r_next * 2 + 1)
+            rs[-1].merge(Constant(0))
+            return app, rs
+
+        count = 2**10
+        timings = Times()
+
+        app, rs = make_app(count)
+        timings.add("setup lazy")
+        lazy = [r.get_most_narrow() for r in rs]
+        timings.add("lazy")
+
+        app, rs = make_app(count)
+        timings.add("_setup batch")
+        resolved = resolve_parameters(app)
+        timings.add("batch")
+        self.assertEqual([resolved[r] for r in rs], lazy)
+
+        print(timings)
+        print(f"----> lazy/batch {timings.times['lazy'] / timings.times['batch']:.1f}x")
+
     def test_graph_merge_rec(self):
         timings = Times()
         count = 2**14
@@ -209,4 +595,9 @@ class TestPerformance(unittest.TestCase):
 
 
 if __name__ == "__main__":
-    unittest.main()
+    # benchmark run of a single backend, see test_benchmark_backends
+    if sys.argv[1:2] == ["--benchmark"]:
+        out, *sizes = sys.argv[2:]
+        Path(out).write_text(json.dumps(run_benchmarks([int(s) for s in sizes])))
+    else:
+        unittest.main()
@@ -0,0 +1,173 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from faebryk.core.core import Module, ModuleInterface, Node
+from faebryk.core.snapshot import SnapshotError, dumps, loads
+from faebryk.core.util import (
+    get_all_nodes_of_type,
+    get_connected_mifs,
+    get_node_children_all,
+)
+from faebryk.libs.util import times
+
+
+class App(Module):
+    def __init__(self) -> None:
+        super().__init__()
+
+        import faebryk.library._F as F
+
+        class _NODEs(Module.NODES()):
+            rs = [F.Resistor() for _ in range(3)]
+            led = F.LEDIndicator()
+            power = F.ElectricPower()
+
+        self.NODEs = _NODEs(self)
+
+        for r in self.NODEs.rs:
+            self.NODEs.power.IFs.hv.connect(r.IFs.unnamed[0])
+            r.PARAMs.resistance.merge(F.Range(10, 20))
+        self.NODEs.rs[0].PARAMs.rated_power.merge(F.Set([F.Constant(1), F.Constant(2)]))
+        self.NODEs.power.add_trait(
+            F.has_single_electric_reference_defined(self.NODEs.power)
+        )
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_roundtrip(self):
+        import faebryk.library._F as F
+
+        def connections(app: App):
+            return {
+                n.get_full_name(): sorted(
+                    m.get_full_name() for m in get_connected_mifs(n.GIFs.connected)
+                )
+                for n in get_node_children_all(app)
+                if isinstance(n, ModuleInterface)
+            }
+
+        app = App()
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "app.snapshot"
+            app.save_snapshot(path)
+            restored = App.load_snapshot(path)
+
+        self.assertIsNot(restored, app)
+        self.assertEqual(connections(restored), connections(app))
+        self.assertEqual(
+            {
+                n.get_full_name()
+                for n in get_all_nodes_of_type(restored.get_graph(), F.Resistor)
+            },
+            {
+                n.get_full_name()
+                for n in get_all_nodes_of_type(app.get_graph(), F.Resistor)
+            },
+        )
+
+        r0 = restored.NODEs.rs[0]
+        self.assertEqual(r0.PARAMs.resistance.get_most_narrow(), F.Range(10, 20))
+        self.assertEqual(
+            r0.PARAMs.rated_power.get_most_narrow(),
+            F.Set([F.Constant(1), F.Constant(2)]),
+        )
+        self.assertIs(
+            restored.NODEs.power.get_trait(
+                F.has_single_electric_reference
+            ).get_reference(),
+            restored.NODEs.power,
+        )
+        self.assertEqual(
+            [type(t) for t in r0.traits], [type(t) for t in app.NODEs.rs[0].traits]
+        )
+
+        # restored design stays usable and independent of the original
+        r = F.Resistor()
+        restored.NODEs.extra = r
+        r.IFs.unnamed[0].connect(restored.NODEs.power.IFs.hv)
+        self.assertTrue(r.IFs.unnamed[0].is_connected_to(r0.IFs.unnamed[0]))
+        self.assertFalse(
+            r.IFs.unnamed[0].is_connected_to(app.NODEs.rs[0].IFs.unnamed[0])
+        )
+        self.assertEqual(r.get_full_name(), "*.extra")
+
+    def test_prototype(self):
+        import faebryk.library._F as F
+        from faebryk.core.snapshot import Prototype
+
+        def connections(node: Node):
+            return {
+                n.get_full_name(): sorted(
+                    m.get_full_name() for m in get_connected_mifs(n.GIFs.connected)
+                )
+                for n in get_node_children_all(node)
+                if isinstance(n, ModuleInterface)
+            }
+
+        prototype = Prototype(F.LEDIndicator)
+        led1, led2 = prototype.clone(), prototype.clone()
+        self.assertEqual(connections(led1), connections(F.LEDIndicator()))
+
+        # clones are independent of each other
+        self.assertIsNot(led1.IFs.power_in, led2.IFs.power_in)
+        self.assertIs(led1.IFs.power_in, led1.IFs.get_all()[1])
+        led1.IFs.power_in.connect(led2.IFs.power_in)
+        self.assertNotIn(
+            led2.IFs.logic_in.IFs.signal,
+            get_connected_mifs(led1.IFs.logic_in.IFs.signal.GIFs.connected),
+        )
+
+        r1, r2 = times(2, Prototype(F.Resistor).clone)
+        r1.PARAMs.resistance.merge(F.Constant(100))
+        self.assertIsInstance(r2.PARAMs.resistance.get_most_narrow(), F.TBD)
+        self.assertIs(r1.get_trait(F.can_bridge).get_in(), r1.IFs.unnamed[0])
+
+        # classes not bound to the prototype are shared
+        self.assertIs(type(r1.GIFs), type(F.Resistor().GIFs))
+        self.assertIsNot(type(r1.IFs), type(r2.IFs))
+
+        # clones can be used like any other instance
+        app = Module()
+        app.NODEs.leds = [led1, led2]
+        self.assertEqual(led2.IFs.power_in.get_full_name(), "*.leds[1].power_in")
+
+    def test_factory_classes(self):
+        import faebryk.library._F as F
+
+        app = Module()
+        app.NODEs.ps = times(3, F.ElectricPower)
+        app.NODEs.ps[0].connect_shallow(app.NODEs.ps[1])
+        restored = loads(dumps(app))
+        p0, p1, p2 = restored.NODEs.ps
+
+        # classes of memoized factories are referenced, not copied
+        self.assertIs(type(p0.GIFs), type(app.NODEs.ps[0].GIFs))
+        self.assertIs(type(p0.is_connected_to(p1)), F.ElectricPower.LinkDirectShallow())
+
+        # mixes restored and new links
+        p1.connect_shallow(p2)
+        self.assertTrue(p0.is_connected_to(p2))
+        self.assertFalse(p0.IFs.hv.is_connected_to(p2.IFs.hv))
+        p0.IFs.hv.connect(p2.IFs.hv)
+        self.assertTrue(p0.IFs.hv.is_connected_to(p2.IFs.hv))
+        self.assertFalse(p0.IFs.hv.is_connected_to(app.NODEs.ps[2].IFs.hv))
+
+    def test_graph_and_header(self):
+        n = Node()
+        n.NODEs.child = Node()
+
+        G = loads(dumps(n.get_graph()))
+        self.assertEqual(G.node_cnt, n.get_graph().node_cnt)
+        self.assertEqual(G.edge_cnt, n.get_graph().edge_cnt)
+
+        data = dumps(n)
+        self.assertRaises(SnapshotError, lambda: loads(b"garbage" + data))
+        self.assertRaises(SnapshotError, lambda: loads(data[:4]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,8 +5,23 @@ import unittest
 from enum import StrEnum
 from typing import Iterable
 
-from faebryk.core.core import Module, ModuleInterface, Node, Parameter
-from faebryk.core.util import get_children, get_node_tree, iter_tree_by_depth
+from faebryk.core.core import (
+    GraphInterfaceSelf,
+    Module,
+    ModuleInterface,
+    Node,
+    Parameter,
+    Trait,
+)
+from faebryk.core.util import (
+    get_all_nodes_of_type,
+    get_all_nodes_with_trait,
+    get_children,
+    get_electrical_nets,
+    get_node_tree,
+    get_nodes_from_gifs,
+    iter_tree_by_depth,
+)
 
 
 class TestUtil(unittest.TestCase):
@@ -179,6 +194,94 @@ class TestUtil(unittest.TestCase):
             list(visit_tree(tree[EN][0])),
         )
 
+    def test_graph_indexes(self):
+        class trait(Trait): ...
+
+        class trait_impl(trait.impl()): ...
+
+        class dyn_trait_impl(trait.impl()):
+            def is_implemented(self):
+                return False
+
+        class N(Module):
+            def __init__(self, cnt: int):
+                super().__init__()
+
+                class _IFs(Module.IFS()):
+                    mifs = [ModuleInterface() for _ in range(cnt)]
+
+                self.IFs = _IFs(self)
+
+        left, right = N(3), N(2)
+        left.IFs.mifs[0].add_trait(trait_impl())
+        right.IFs.mifs[1].add_trait(dyn_trait_impl())
+
+        # traits added before the graphs got merged
+        left.IFs.mifs[1].connect(right.IFs.mifs[0])
+        # trait added after merge
+        right.add_trait(trait_impl())
+        G = left.get_graph()
+
+        all_nodes = get_nodes_from_gifs(G.subgraph_type(GraphInterfaceSelf))
+        self.assertEqual(
+            set(map(id, get_all_nodes_of_type(G, Node))), set(map(id, all_nodes))
+        )
+        self.assertEqual(get_all_nodes_of_type(G, N), {left, right})
+        self.assertEqual(len(get_all_nodes_of_type(G, ModuleInterface)), 5)
+        self.assertEqual(
+            {n for n, _ in get_all_nodes_with_trait(G, trait)},
+            {left.IFs.mifs[0], right},
+        )
+
+        right.del_trait(trait)
+        self.assertEqual(
+            [n for n, _ in get_all_nodes_with_trait(G, trait)], [left.IFs.mifs[0]]
+        )
+
+    def test_electrical_nets(self):
+        from faebryk.library.Electrical import Electrical
+        from faebryk.library.ElectricPower import ElectricPower
+        from faebryk.library.Net import Net
+        from faebryk.library.Resistor import Resistor
+        from faebryk.libs.app.erc import ERCFault, simple_erc
+
+        m = Module()
+        m.NODEs.power = ElectricPower()
+        m.NODEs.rs = [Resistor() for _ in range(3)]
+        m.NODEs.gnd = Net.with_name("GND")
+        hv, lv = m.NODEs.power.IFs.hv, m.NODEs.power.IFs.lv
+        for r in m.NODEs.rs:
+            r.IFs.unnamed[0].connect(hv)
+        # chained, connected through each other
+        lv.connect(m.NODEs.rs[0].IFs.unnamed[1])
+        m.NODEs.rs[0].IFs.unnamed[1].connect(m.NODEs.rs[1].IFs.unnamed[1])
+        m.NODEs.gnd.IFs.part_of.connect(m.NODEs.rs[1].IFs.unnamed[1])
+
+        G = m.get_graph()
+        nets = get_electrical_nets(G)
+        els = get_all_nodes_of_type(G, Electrical)
+        self.assertEqual(sum(len(group) for group in nets.groups), len(els))
+        for el in els:
+            self.assertEqual(
+                nets.get_group(el),
+                {el} | {mif for mif in el.get_connected() if mif in els},
+            )
+        self.assertEqual(len(nets.get_group(hv)), 4)
+        self.assertEqual(nets.get_nets(lv), {m.NODEs.gnd})
+        self.assertFalse(nets.get_nets(hv))
+        self.assertFalse(nets.is_connected(hv, lv))
+        self.assertIs(get_electrical_nets(G), nets)
+        simple_erc(G)
+
+        # connecting changes the graph and thus the partition
+        m.NODEs.rs[2].IFs.unnamed[1].connect(m.NODEs.rs[2].IFs.unnamed[0])
+        old, nets = nets, get_electrical_nets(G)
+        self.assertIsNot(nets, old)
+        self.assertTrue(nets.is_connected(*m.NODEs.rs[2].IFs.unnamed))
+        self.assertFalse(nets.is_connected(hv, lv))
+        with self.assertRaisesRegex(ERCFault, "shorted component"):
+            simple_erc(G)
+
 
 if __name__ == "__main__":
     unittest.main()
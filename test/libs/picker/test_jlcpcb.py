@@ -9,7 +9,11 @@ import faebryk.library._F as F
 import faebryk.libs.picker.lcsc as lcsc
 from faebryk.core.core import Module
 from faebryk.libs.logging import setup_basic_logging
-from faebryk.libs.picker.jlcpcb.jlcpcb import JLCPCB_DB
+from faebryk.libs.picker.jlcpcb.jlcpcb import (
+    JLCPCB_DB,
+    ComponentQuery,
+    MappingParameterDB,
+)
 from faebryk.libs.picker.jlcpcb.pickers import add_jlcpcb_pickers
 from faebryk.libs.picker.picker import DescriptiveProperties, has_part_picked
 
@@ -355,6 +359,42 @@ class TestPickerJlcpcb(unittest.TestCase):
         JLCPCB_DB.get().close()
 
 
+class TestFilterByModuleParams(unittest.TestCase):
+    class FakeComponent:
+        def __init__(self, lcsc: int, resistance: float):
+            self.lcsc = lcsc
+            self.resistance = resistance
+            self.basic = self.preferred = False
+            self.description = ""
+            self.parsed = False
+
+        def get_params(self, mapping: list[MappingParameterDB]):
+            self.parsed = True
+            return [F.Constant(self.resistance)]
+
+        def get_price(self, qty: int = 1) -> float:
+            return 0
+
+    def test_recheck_after_narrowing(self):
+        resistances = [10, 20, 10] + [10] * 100
+        components = [self.FakeComponent(i, r) for i, r in enumerate(resistances)]
+        query = ComponentQuery.__new__(ComponentQuery)
+        query.results = list(components)
+        query.PARAMS_CHUNK = 10
+
+        r = F.Resistor()
+        r.PARAMs.resistance.merge(F.Range(5, 30))
+        mapping = [MappingParameterDB("resistance", [])]
+        picks = query.filter_by_module_params(r, mapping)
+        self.assertIs(next(picks), components[0])
+        # parsed lazily
+        self.assertFalse(any(c.parsed for c in components[10:]))
+
+        # a failed attach narrowed the module, the 20 does not match anymore
+        r.PARAMs.resistance.override(F.Constant(10))
+        self.assertIs(next(picks), components[2])
+
+
 if __name__ == "__main__":
     setup_basic_logging()
     logger.setLevel(logging.DEBUG)
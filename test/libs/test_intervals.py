@@ -0,0 +1,56 @@
+# This file is part of the faebryk project
+# SPDX-License-Identifier: MIT
+
+import unittest
+
+import faebryk.library._F as F
+from faebryk.core.core import Parameter
+from faebryk.libs.intervals import Intervals
+
+
+class TestIntervals(unittest.TestCase):
+    def test_same_as_parameters(self):
+        params = [F.Constant(2), F.Range(1, 3), F.Range(-4, 0.5), F.Constant(0.25)]
+        others = [F.Range(2, 5), F.Constant(3), F.Constant(-1), F.Range(0.5, 1)]
+        a, b = Intervals.of(params), Intervals.of(others)
+
+        for op in [
+            lambda x, y: x + y,
+            lambda x, y: x - y,
+            lambda x, y: x * y,
+            lambda x, y: x / y,
+        ]:
+            self.assertEqual(
+                op(a, b).to_params(), [op(p, o) for p, o in zip(params, others)]
+            )
+        self.assertEqual((a * 2).to_params(), [p * 2 for p in params])
+        self.assertEqual((1 - a).to_params(), [F.Constant(1) - p for p in params])
+
+        self.assertEqual(
+            a.is_mergeable_with(b).tolist(),
+            [p.is_mergeable_with(o) for p, o in zip(params, others)],
+        )
+        self.assertEqual(a[1:2].merge(b[1:2]).to_params(), [F.Constant(3)])
+        self.assertRaises(Parameter.MergeException, lambda: a.merge(b))
+
+        self.assertRaises(TypeError, lambda: Intervals.of([F.TBD()]))
+        self.assertRaises(TypeError, lambda: Intervals.of([F.Constant("a")]))
+
+    def test_range_set(self):
+        r = F.Range(10, 20)
+        values = [5, 10, 15.5, 20, 20.1]
+        self.assertEqual(
+            r.contains_all(values).tolist(), [r.contains(v) for v in values]
+        )
+
+        s = F.Set.from_values(values)
+        self.assertIs(next(iter(F.Set.from_values([5]).params)), F.Constant.intern(5))
+        self.assertEqual(
+            r.contains_all(Intervals.of(s.params)).sum(),
+            sum(r.contains(p) for p in s.params),
+        )
+        self.assertEqual(len(s.as_intervals()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
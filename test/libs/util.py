@@ -5,7 +5,7 @@ import unittest
 from itertools import combinations
 
 from faebryk.libs.logging import setup_basic_logging
-from faebryk.libs.util import SharedReference, zip_non_locked
+from faebryk.libs.util import SharedReference, UnionFindReference, zip_non_locked
 
 
 class TestUtil(unittest.TestCase):
@@ -54,6 +54,37 @@ class TestUtil(unittest.TestCase):
 
         all_equal(r1, r2, r3, r4, r5)
 
+    def test_union_find_reference(self):
+        def all_equal(*args: UnionFindReference):
+            for left, right in combinations(args, 2):
+                self.assertIs(left.representative, right.representative)
+                self.assertIs(left(), right())
+                self.assertEqual(left, right)
+
+        rs = [UnionFindReference(i) for i in range(6)]
+
+        rs[0].link(rs[1])
+        all_equal(rs[0], rs[1])
+        self.assertEqual(rs[1](), 0)
+
+        # lhs object wins even if rhs tree is bigger
+        rs[2].link(rs[1])
+        all_equal(*rs[:3])
+        self.assertEqual(rs[0](), 2)
+
+        rs[3].link(rs[4])
+        rs[4].link(rs[5])
+        self.assertNotEqual(rs[0], rs[3])
+        self.assertIsNone(rs[4].link(rs[3]))
+
+        rs[5].link(rs[0])
+        all_equal(*rs)
+        self.assertEqual(rs[1](), 3)
+        self.assertEqual(rs[0].representative._size, len(rs))
+
+        rs[2].set(42)
+        self.assertEqual([r() for r in rs], [42] * len(rs))
+
 
 if __name__ == "__main__":
     setup_basic_logging()